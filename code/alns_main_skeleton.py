@@ -31,13 +31,14 @@ if __name__ == "__main__":
                                           sick_day_attraction, 
                                           nothing_happens_attraction]
 
-    # load data and random seed
-    parsed = Parser(attraction_loc, tourist_loc)
+    # load data and random seed, tourists are streamed as only one is used
+    parsed = Parser(attraction_loc, tourist_loc, lazy_tourists=True)
 
     # Choose a random tourist from the location
-    chosen_tourist = random.choice(parsed.tourists)
+    chosen_tourist = parsed.sample_tourist(random)
 
-    smjsp = SMJSP(chosen_tourist, parsed.attractions)
+    # Only the attractions the tourist can ever visit are planned with
+    smjsp = SMJSP(chosen_tourist, parsed.attractions, candidates=parsed.candidates(chosen_tourist))
 
     sys.exit()
 
@@ -84,16 +85,9 @@ if __name__ == "__main__":
         # visualize final solution and generate output file
         save_output("<YourName>_ALNS", solution, "solution")  # // Modify with your name
 
-        # We then remove the days left using the remaining days
-        del smjsp.tourist.touring_dict[i]
-
-        # We add the current day events to the visited
-        for loc in smjsp.tourist.locations[i]:
-            smjsp.tourist.visited.append(loc)
-
-        # Remove the data
-        del smjsp.tourist.locations[i]
-        del smjsp.tourist.start_times[i]
+        # We then remove the day from the remaining days, its events
+        # become visited
+        smjsp.tourist.finish_day(i)
 
         # We then introduce a random disruption for the next day
         smjsp.attractions = smjsp.attractions
@@ -0,0 +1,311 @@
+"""
+Plan itineraries for every tourist of a Parser, spreading the SMJSP + ALNS
+runs over a process pool. The attraction table lives in shared memory, so
+only the tourist and its seed are pickled per task
+"""
+import copy
+import itertools
+import os
+import traceback
+
+import numpy as np
+import numpy.random as rnd
+
+from collections import deque, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from rcjsp import Attraction, AttractionTable, CandidateSet, Parser, SMJSP
+from src.alns import ALNS
+from tqdm import tqdm
+from typing import Callable, List
+
+# Outcome of one tourist. schedule maps day to a list of
+# (attraction idx, start time) sorted by start time, error holds the
+# formatted traceback when the run failed (schedule and objective are None),
+# unknown_must_visit the must visit names no attraction has and
+# blocked_must_visit the (constraint, names) of must visits that cannot be
+# placed, see must_visit.place_must_visits
+TouristResult = namedtuple("TouristResult",
+                           ["tourist_idx", "seed", "objective", "schedule", "error", "unknown_must_visit",
+                            "blocked_must_visit"],
+                           defaults=[(), ()])
+
+# Settings every worker needs, sent once per worker instead of per task
+_SolverConfig = namedtuple("_SolverConfig", ["destroy_operators",
+                                             "repair_operators",
+                                             "criterion",
+                                             "weights",
+                                             "operator_decay",
+                                             "iterations",
+                                             "weighting",
+                                             "skip_blocked"])
+
+# Error of a tourist whose worker process died while solving it
+_WORKER_DIED = "Worker process died while solving this tourist.\n"
+
+_TABLE_COLUMNS = ["names", "lat_long", "task_time", "opening_hours", "cost", "category_mask"]
+
+# Per worker process state, set by _init_worker
+_worker = {}
+
+
+def _share_table(table : AttractionTable):
+    """
+    Copy the table columns into shared memory blocks. Returns the blocks,
+    which the caller must close and unlink, and the spec to attach them.
+    A distance matrix mapped from the cache is shared through its file
+    """
+    columns = table.to_columns()
+    spec = {}
+    if isinstance(table.distances, np.memmap):
+        spec["distances_file"] = table.distances.filename
+    elif table.distances is not None:
+        columns["distances"] = table.distances
+
+    blocks = []
+    for column, values in columns.items():
+        values = np.ascontiguousarray(values)
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[...] = values
+        blocks.append(block)
+        spec[column] = (block.name, values.shape, values.dtype.str)
+    return blocks, spec
+
+
+def _attach_table(spec : dict):
+    """
+    Attach to the shared columns, read only so one run cannot change the
+    attractions seen by the others
+    """
+    blocks = []
+    columns = {}
+    for column in _TABLE_COLUMNS:
+        name, shape, dtype = spec[column]
+        block = shared_memory.SharedMemory(name=name)
+        values = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        values.flags.writeable = False
+        blocks.append(block)
+        columns[column] = values
+
+    table = AttractionTable.from_columns(columns)
+    if "distances_file" in spec:
+        table.distances = np.load(spec["distances_file"], mmap_mode="r")
+    elif "distances" in spec:
+        name, shape, dtype = spec["distances"]
+        block = shared_memory.SharedMemory(name=name)
+        table.distances = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        table.distances.flags.writeable = False
+        blocks.append(block)
+    return blocks, table
+
+
+def _init_worker(spec : dict, config : _SolverConfig) -> None:
+    blocks, table = _attach_table(spec)
+    # The blocks must outlive the arrays viewing them
+    _worker["blocks"] = blocks
+    _worker["attractions"] = [Attraction(table, idx) for idx in range(len(table))]
+    _worker["config"] = config
+
+
+def _solve_one(task) -> TouristResult:
+    """
+    Run ALNS for one tourist. Any exception is caught and reported in the
+    result, so one bad tourist does not take down the batch
+    """
+    tourist, seed = task
+    config = _worker["config"]
+
+    try:
+        attractions = _worker["attractions"]
+        candidates = CandidateSet(tourist, attractions[0].table) if attractions else None
+        state = SMJSP(tourist, attractions, config.weighting, candidates)
+        state.random_initialize(seed)
+        unknown = tuple(state.unknown_must_visit)
+        blocked = tuple((constraint, tuple(names)) for constraint, names in state.blocked_must_visit)
+
+        # No schedule meets every must visit, do not spend a run on it
+        if blocked and config.skip_blocked:
+            return TouristResult(tourist.idx, seed, None, None, None, unknown, blocked)
+
+        alns = ALNS(rnd.RandomState(seed))
+        for operator in config.destroy_operators:
+            alns.add_destroy_operator(operator)
+        for operator in config.repair_operators:
+            alns.add_repair_operator(operator)
+
+        # Criteria such as simulated annealing carry state between
+        # iterations, every tourist starts from a fresh one
+        # Only the batch shows progress, not every run in it
+        result = alns.iterate(state,
+                              config.weights,
+                              config.operator_decay,
+                              copy.deepcopy(config.criterion),
+                              iterations=config.iterations,
+                              collect_stats=False,
+                              progress=False)
+
+        best = result.best_state
+        schedule = {day : [(attraction.idx, start)
+                           for attraction, start in zip(timeline.attractions, timeline.starts)]
+                    for day, timeline in best.tourist.timelines.items()}
+        return TouristResult(tourist.idx, seed, best.objective(), schedule, None, unknown, blocked)
+    except Exception:
+        return TouristResult(tourist.idx, seed, None, None, traceback.format_exc())
+
+
+def _solve_chunk(tasks : list) -> List[TouristResult]:
+    return [_solve_one(task) for task in tasks]
+
+
+def _result(future : Future):
+    """
+    Result of the future, None when its worker process died. New pools are
+    only started outside the except block, workers forked inside it would
+    chain the exception to every error they report
+    """
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        return None
+
+
+def _submit(pool : ProcessPoolExecutor, fn, arg) -> Future:
+    """
+    pool.submit(fn, arg), or a failed future when the pool already broke
+    """
+    try:
+        return pool.submit(fn, arg)
+    except BrokenProcessPool as error:
+        future = Future()
+        future.set_exception(error)
+        return future
+
+
+def _done(results : List[TouristResult]) -> Future:
+    future = Future()
+    future.set_result(results)
+    return future
+
+
+def _run_chunks(chunks, processes : int, spec : dict, config : _SolverConfig):
+    """
+    Yield the results of the chunks in order, at most two chunks per
+    process are in flight so streamed tourists stay bounded. A worker that
+    dies (e.g. killed, or crashed in native code) breaks the pool and every
+    chunk in flight with it. Their tourists are then run again one at a
+    time on a new pool, so the tourist that kills its worker again is the
+    only one reported with _WORKER_DIED
+    """
+    def executor():
+        return ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(spec, config))
+
+    pool = executor()
+    # [tasks, future] per chunk in flight, in order
+    pending = deque()
+    try:
+        while True:
+            for tasks in itertools.islice(chunks, 2 * processes - len(pending)):
+                pending.append([tasks, _submit(pool, _solve_chunk, tasks)])
+            if not pending:
+                return
+
+            results = _result(pending[0][1])
+            if results is None:
+                pool.shutdown(wait=True)
+                pool = executor()
+                for entry in pending:
+                    tasks, future = entry
+                    if future.done() and future.exception() is None:
+                        continue
+
+                    results = []
+                    for tourist, seed in tasks:
+                        result = _result(_submit(pool, _solve_one, (tourist, seed)))
+                        if result is None:
+                            pool.shutdown(wait=True)
+                            pool = executor()
+                            result = TouristResult(tourist.idx, seed, None, None, _WORKER_DIED)
+                        results.append(result)
+                    entry[1] = _done(results)
+                continue
+
+            pending.popleft()
+            yield from results
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_seeds(master_seed : int):
+    """
+    Endless stream of independent, reproducible seeds derived from
+    master_seed, one per tourist
+    """
+    sequence = np.random.SeedSequence(master_seed)
+    while True:
+        yield int(sequence.spawn(1)[0].generate_state(1)[0])
+
+
+def tourist_seeds(master_seed : int, n : int) -> List[int]:
+    """
+    The first n seeds of iter_seeds(master_seed)
+    """
+    return list(itertools.islice(iter_seeds(master_seed), n))
+
+
+def solve_all(parsed : Parser,
+              destroy_operators : List[Callable],
+              repair_operators : List[Callable],
+              criterion,
+              weights : list,
+              operator_decay : float,
+              iterations : int = 1000,
+              seed : int = 606,
+              processes : int = None,
+              weighting : list = [0.5, 0.5],
+              chunksize : int = 1,
+              progress : bool = True,
+              skip_blocked : bool = True) -> List[TouristResult]:
+    """
+    Solve every tourist of parsed with ALNS on a process pool
+
+    Operators and the criterion are pickled to the workers, so operators
+    must be module level functions. Tourist i gets seed
+    tourist_seeds(seed, n)[i], which makes results independent of the
+    number of processes. Results are returned in tourist order, failed
+    tourists have their traceback in TouristResult.error, tourists whose
+    worker process kept dying have _WORKER_DIED there. Tourists are sent
+    to the workers in chunks of chunksize
+
+    A tourist whose must visits cannot all be placed is known from the
+    initial solution and has the blocking constraints in
+    TouristResult.blocked_must_visit. With skip_blocked no ALNS run is
+    spent on it, objective and schedule are then None
+    """
+    if parsed.tourists is not None:
+        tourists = parsed.tourists
+        total = len(tourists)
+    else:
+        # Lazy parser, stream the tourists into the pool
+        tourists = (tourist for chunk in parsed.iter_tourists() for tourist in chunk)
+        total = None
+
+    config = _SolverConfig(list(destroy_operators),
+                           list(repair_operators),
+                           criterion,
+                           list(weights),
+                           operator_decay,
+                           iterations,
+                           list(weighting),
+                           skip_blocked)
+
+    tasks = zip(tourists, iter_seeds(seed))
+    chunks = iter(lambda: list(itertools.islice(tasks, chunksize)), [])
+    blocks, spec = _share_table(parsed.attraction_table)
+    try:
+        results = _run_chunks(chunks, processes or os.cpu_count(), spec, config)
+        return list(tqdm(results, total=total, disable=not progress))
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
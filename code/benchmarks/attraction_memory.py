@@ -0,0 +1,104 @@
+"""
+Memory used per attraction, before (one Python object per csv row holding
+lists, dicts and strings) and after (columnar AttractionTable plus __slots__
+row views)
+
+Usage: python benchmarks/attraction_memory.py [n_attractions]
+"""
+import ast
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rcjsp import Attraction, AttractionTable
+
+
+class LegacyAttraction(object):
+    """
+    Equivalent of the attraction class before the columnar table
+    """
+
+    def __init__(self, attraction_data : list, idx : int):
+        self.type_list = ["Cultural",
+                          "Sporty",
+                          "Nature",
+                          "Family",
+                          "Shopping",
+                          "Culinary",
+                          "Outdoor"]
+
+        self.idx = idx
+        self.attraction_name = attraction_data[0]
+        self.lat_long = [float(attraction_data[1]), float(attraction_data[2])]
+        self.task_time = float(attraction_data[3])
+        self.opening_hours = ast.literal_eval(attraction_data[4])
+
+        for key in self.opening_hours.keys():
+            hours = self.opening_hours[key]
+            new_hours = []
+            for hour in hours:
+                if int(hour) != float(hour):
+                    new_hours.append(float(int(hour)) + 0.5)
+                else:
+                    new_hours.append(float(hour))
+            self.opening_hours[key] = new_hours
+
+        self.cost = int(attraction_data[5])
+        self.location_encoding = attraction_data[6:]
+
+        self.categories = []
+        for index, encoding in enumerate(self.location_encoding):
+            if int(encoding) == 1:
+                self.categories.append(self.type_list[index])
+
+
+def synthetic_rows(n : int, seed : int = 606) -> list:
+    """
+    n csv rows shaped like AttractionProfile.csv
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        open_hour, close_hour = rng.randint(0, 10), rng.randint(16, 23)
+        hours = ", ".join("{}: [{}, {}]".format(day, open_hour, close_hour) for day in range(1, 8))
+        rows.append(["Attraction {}".format(i),
+                     str(103.6 + rng.random() * 0.4),
+                     str(1.2 + rng.random() * 0.25),
+                     str(rng.randint(1, 8)),
+                     "{" + hours + "}",
+                     str(rng.randint(0, 100))] +
+                    [str(rng.randint(0, 1)) for _ in range(7)])
+    return rows
+
+
+def measure(build) -> int:
+    """
+    Bytes still allocated by what build() returns
+    """
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def build_table(rows : list):
+    table = AttractionTable.from_rows(rows)
+    return table, [Attraction(table, idx) for idx in range(len(table))]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = synthetic_rows(n)
+
+    before = measure(lambda: [LegacyAttraction(row, idx) for idx, row in enumerate(rows)])
+    after = measure(lambda: build_table(rows))
+
+    print("{} attractions".format(n))
+    print("before: {:8.1f} bytes per attraction".format(before / n))
+    print("after:  {:8.1f} bytes per attraction".format(after / n))
+    print("ratio:  {:8.1f}x".format(before / after))
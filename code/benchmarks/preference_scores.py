@@ -0,0 +1,55 @@
+"""
+Bulk preference scoring against per pair Tourist.visit_score style
+popcounts, then the chunked scoring of a large tourist batch
+
+Usage: python benchmarks/preference_scores.py [n_tourists] [n_attractions]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import preference_scores
+from rcjsp import TYPE_LIST
+
+# Tourists scored per pair, the Python loop is too slow for more
+N_PAIRWISE = 1000
+
+
+def pairwise(preference_masks : np.ndarray, category_masks : np.ndarray) -> np.ndarray:
+    category_masks = category_masks.tolist()
+    return np.array([[bin(preference & category).count("1") for category in category_masks]
+                     for preference in preference_masks.tolist()], dtype=np.uint8)
+
+
+if __name__ == "__main__":
+    n_tourists = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    n_attractions = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    rng = np.random.RandomState(606)
+    n_masks = 1 << len(TYPE_LIST)
+    category_masks = rng.randint(0, n_masks, n_attractions)
+    preference_masks = rng.randint(0, n_masks, n_tourists)
+
+    start = time.perf_counter()
+    table = preference_scores.score_table(category_masks, len(TYPE_LIST))
+    print("score table      {:>10.1f} ms".format((time.perf_counter() - start) * 1e3))
+
+    sample = preference_masks[:N_PAIRWISE]
+    start = time.perf_counter()
+    expected = pairwise(sample, category_masks)
+    print("pairwise {:>7} {:>10.1f} ms".format(len(sample), (time.perf_counter() - start) * 1e3))
+
+    start = time.perf_counter()
+    scores = preference_scores.score_matrix(sample, table)
+    print("bulk     {:>7} {:>10.1f} ms".format(len(sample), (time.perf_counter() - start) * 1e3))
+    assert np.array_equal(scores, expected)
+
+    start = time.perf_counter()
+    total = 0
+    for _, block in preference_scores.iter_score_blocks(preference_masks, table):
+        total += int(block.sum(dtype=np.int64))
+    print("blocks   {:>7} {:>10.1f} ms, {} MB per block".format(
+        n_tourists, (time.perf_counter() - start) * 1e3, preference_scores._BLOCK_ELEMENTS >> 20))
@@ -0,0 +1,69 @@
+"""
+GridIndex build and query times against a brute force haversine scan, at
+1k, 10k and 100k attractions
+
+Usage: python benchmarks/spatial_index.py [n_queries]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from distance_matrix import haversine_km
+from spatial_index import GridIndex
+
+K = 10
+RADIUS_KM = 1.0
+
+
+def random_lat_long(n : int, rng : np.random.RandomState) -> np.ndarray:
+    """
+    n points spread over Singapore, (longitude, latitude) like the csv
+    """
+    return np.column_stack([rng.uniform(103.6, 104.0, n), rng.uniform(1.2, 1.45, n)])
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def brute_knn(lat_long : np.ndarray, queries : np.ndarray, k : int) -> np.ndarray:
+    return np.array([np.argsort(haversine_km(query, lat_long), kind="stable")[:k] for query in queries])
+
+
+def brute_radius(lat_long : np.ndarray, queries : np.ndarray, radius_km : float) -> list:
+    return [np.flatnonzero(haversine_km(query, lat_long) <= radius_km) for query in queries]
+
+
+if __name__ == "__main__":
+    n_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = np.random.RandomState(606)
+
+    print("{:>8} {:>10} {:>14} {:>14} {:>14} {:>14}".format(
+        "n", "build ms", "grid knn ms", "scan knn ms", "grid rad ms", "scan rad ms"))
+    for n in [1000, 10000, 100000]:
+        lat_long = random_lat_long(n, rng)
+        queries = random_lat_long(n_queries, rng)
+
+        build = timed(lambda: GridIndex(lat_long))
+        index = GridIndex(lat_long)
+
+        grid_knn = timed(lambda: index.knn(queries, K))
+        scan_knn = timed(lambda: brute_knn(lat_long, queries, K))
+        grid_radius = timed(lambda: index.radius(queries, RADIUS_KM))
+        scan_radius = timed(lambda: brute_radius(lat_long, queries, RADIUS_KM))
+
+        # Both must agree before the timings mean anything
+        assert all(np.array_equal(a, b) for a, b in
+                   zip(index.radius(queries, RADIUS_KM), brute_radius(lat_long, queries, RADIUS_KM)))
+        _, grid_km = index.knn(queries, K)
+        scan_km = np.array([np.sort(haversine_km(query, lat_long))[:K] for query in queries])
+        assert np.allclose(grid_km, scan_km)
+
+        print("{:>8} {:>10.1f} {:>14.1f} {:>14.1f} {:>14.1f} {:>14.1f}".format(
+            n, build * 1e3, grid_knn * 1e3, scan_knn * 1e3, grid_radius * 1e3, scan_radius * 1e3))
@@ -0,0 +1,214 @@
+"""
+Exact optimizer for a single tourist day. A day holds at most
+MAX_ACTIVITIES_PER_DAY visits with MIN_BREAK hours between them, so every
+ordered schedule of up to three candidates can be priced with a few numpy
+operations and a branch and bound over the middle visit
+
+For a fixed order of visits, starting every visit as early as possible is
+always feasible when any start times are, so only the order is searched
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from distance_matrix import haversine_km
+from rcjsp import MIN_BREAK, MUST_VISIT_PENALTY, SLOT_HOURS, SMJSP, TYPE_LIST
+
+# Best schedule for a day. value is the change of the objective compared to
+# the day being empty, visits is a list of (Attraction, start time)
+DaySchedule = namedtuple("DaySchedule", ["value", "visits"])
+
+
+def _ceil_grid(hours):
+    return np.ceil(np.asarray(hours) / SLOT_HOURS - 1e-9) * SLOT_HOURS
+
+
+def _floor_grid(hours):
+    return np.floor(np.asarray(hours) / SLOT_HOURS + 1e-9) * SLOT_HOURS
+
+
+def _visit_values(state : SMJSP, ids : np.ndarray) -> np.ndarray:
+    """
+    Objective change of visiting each attraction, ignoring travel
+    """
+    tourist = state.tourist
+    table = state.attraction_table
+    masks = table.category_mask[ids] & tourist.preference_mask
+    scores = sum((masks >> bit) & 1 for bit in range(len(TYPE_LIST)))
+    must_visit = np.array([table.names[idx] in tourist._must_visit_names for idx in ids], dtype=bool)
+    return -state.weighting[1] * scores - MUST_VISIT_PENALTY * must_visit
+
+
+def _distances(state : SMJSP, ids : np.ndarray) -> np.ndarray:
+    table = state.attraction_table
+    if table.distances is not None:
+        return np.asarray(table.distances[np.ix_(ids, ids)], dtype=np.float64)
+    lat_long = table.lat_long[ids]
+    return haversine_km(lat_long[:, np.newaxis], lat_long[np.newaxis, :])
+
+
+def solve_day(state : SMJSP,
+              day : int,
+              candidates : list = None,
+              budget : float = None,
+              relaxed : bool = False) -> DaySchedule:
+    """
+    Optimal schedule for the day, planned from scratch (visits already on
+    the day are ignored). Other days are left as they are: attractions
+    scheduled there are not candidates and budget defaults to what they
+    leave over
+
+    candidates : attractions to choose from, default state.attractions
+    budget : money available for the day
+    relaxed : ignore the other days entirely (full budget, every
+              candidate), used for objective_bound
+    """
+    tourist = state.tourist
+    table = state.attraction_table
+    if day not in tourist._touring_dict:
+        return DaySchedule(0.0, [])
+
+    if candidates is None:
+        candidates = state.attractions
+    by_idx = {attraction.idx : attraction for attraction in candidates}
+
+    other_days = {attraction.idx
+                  for other, timeline in tourist._timelines.items() if other != day
+                  for attraction in timeline.attractions}
+    if budget is None:
+        budget = tourist.budget
+        if not relaxed:
+            budget -= sum(int(table.cost[idx]) for idx in other_days)
+
+    ids = np.array([idx for idx in by_idx if relaxed or idx not in other_days], dtype=np.int64)
+    if len(ids) == 0:
+        return DaySchedule(0.0, [])
+
+    # Window of feasible start times per candidate, NaN (closed) drops out
+    tour_start, tour_end = tourist._touring_dict[day]
+    hours = table.opening_hours[ids, day]
+    task_time = table.task_time[ids]
+    earliest = _ceil_grid(np.maximum(hours[:, 0], tour_start))
+    latest = _floor_grid(np.minimum(hours[:, 1], tour_end) - task_time)
+    keep = (earliest <= latest) & (table.cost[ids] <= budget)
+
+    ids, task_time, earliest, latest = ids[keep], task_time[keep], earliest[keep], latest[keep]
+    cost = table.cost[ids]
+    n = len(ids)
+    if n == 0:
+        return DaySchedule(0.0, [])
+
+    values = _visit_values(state, ids)
+    travel = state.weighting[0] * _distances(state, ids)
+
+    # One visit
+    best_value, best_order = 0.0, ()
+    first = int(np.argmin(values))
+    if values[first] < best_value:
+        best_value, best_order = float(values[first]), (first,)
+
+    # Two visits, a then b with b as early as the break allows
+    second_start = np.maximum(earliest[np.newaxis, :],
+                              _ceil_grid(earliest + task_time + MIN_BREAK)[:, np.newaxis])
+    pair_ok = (second_start <= latest[np.newaxis, :]) & \
+        (cost[:, np.newaxis] + cost[np.newaxis, :] <= budget)
+    np.fill_diagonal(pair_ok, False)
+    pair_value = np.where(pair_ok, values[:, np.newaxis] + values[np.newaxis, :] + travel, np.inf)
+
+    pair = np.unravel_index(np.argmin(pair_value), pair_value.shape)
+    if pair_value[pair] < best_value:
+        best_value, best_order = float(pair_value[pair]), (int(pair[0]), int(pair[1]))
+
+    if n < 3:
+        return _schedule(best_value, best_order, ids, by_idx, earliest, task_time)
+
+    # Three visits a, b, c. For a fixed middle b the value splits into a
+    # part depending on a and one on c, coupled only through the time c
+    # must start after. Ignoring budget and a != c gives a lower bound per b
+    # that decides which b are searched exactly
+    by_latest = np.argsort(-latest, kind="stable")
+    bounds = np.full(n, np.inf)
+    thresholds = {}
+    for b in range(n):
+        column_ok = pair_ok[:, b]
+        if not column_ok.any():
+            continue
+        threshold = _ceil_grid(second_start[:, b] + task_time[b] + MIN_BREAK)
+        third_value = values + travel[b]
+        third_value[b] = np.inf
+
+        # Best third visit among those whose window reaches each threshold
+        suffix_best = np.minimum.accumulate(third_value[by_latest])
+        reach = np.searchsorted(-latest[by_latest], -threshold, side="right")
+        best_third = np.where(reach > 0, suffix_best[np.maximum(reach - 1, 0)], np.inf)
+
+        first_value = np.where(column_ok, values + travel[:, b], np.inf)
+        bounds[b] = values[b] + np.min(first_value + best_third)
+        thresholds[b] = (threshold, first_value, third_value)
+
+    for b in np.argsort(bounds, kind="stable"):
+        if not bounds[b] < best_value:
+            break
+        threshold, first_value, third_value = thresholds[b]
+        triple_value = values[b] + first_value[:, np.newaxis] + third_value[np.newaxis, :]
+        triple_ok = (latest[np.newaxis, :] >= threshold[:, np.newaxis]) & \
+            (cost[:, np.newaxis] + cost[b] + cost[np.newaxis, :] <= budget)
+        np.fill_diagonal(triple_ok, False)
+        triple_value = np.where(triple_ok, triple_value, np.inf)
+
+        a, c = np.unravel_index(np.argmin(triple_value), triple_value.shape)
+        if triple_value[a, c] < best_value:
+            best_value, best_order = float(triple_value[a, c]), (int(a), int(b), int(c))
+
+    return _schedule(best_value, best_order, ids, by_idx, earliest, task_time)
+
+
+def _schedule(value, order, ids, by_idx, earliest, task_time) -> DaySchedule:
+    """
+    Start every visit of the order as early as possible
+    """
+    visits = []
+    ready = -np.inf
+    for pos in order:
+        start = float(max(earliest[pos], _ceil_grid(ready)))
+        visits.append((by_idx[int(ids[pos])], start))
+        ready = start + task_time[pos] + MIN_BREAK
+    return DaySchedule(value, visits)
+
+
+def apply_day(state : SMJSP, day : int, schedule : DaySchedule) -> None:
+    """
+    Replace the visits of the day by the schedule
+    """
+    tourist = state.tourist
+    for attraction in list(tourist._locations.get(day, [])):
+        tourist.remove(attraction)
+
+    for attraction, start in schedule.visits:
+        tourist.assign(attraction, day, start)
+
+
+def exact_day_repair(destroyed : SMJSP, random_state) -> SMJSP:
+    """
+    Intensification repair operator, re-plans one random touring day
+    optimally given the other days
+    """
+    days = sorted(destroyed.tourist._touring_dict)
+    if not days:
+        return destroyed
+    day = days[random_state.randint(len(days))]
+    apply_day(destroyed, day, solve_day(destroyed, day))
+    return destroyed
+
+
+def objective_bound(state : SMJSP) -> float:
+    """
+    Lower bound on the objective of any schedule of the state's tourist,
+    for gap reporting. Every day is solved on its own with the full
+    budget and all attractions, which can only do better than a real plan
+    """
+    tourist = state.tourist
+    bound = MUST_VISIT_PENALTY * len(tourist._must_visit_names)
+    for day in tourist._touring_dict:
+        bound += solve_day(state, day, relaxed=True).value
+    return bound
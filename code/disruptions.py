@@ -1,25 +1,33 @@
 """
 This handle possible disruptions for the day
 """
+import numpy as np
+
 from rcjsp import Attraction, Tourist
 from typing import List
 
+# Categories that cannot be visited when it rains
+RAINY_DAY_CATEGORIES = ["Sporty", "Nature", "Outdoor"]
+
 def rainy_day_attraction(attraction_list : List[Attraction], day : int) -> List[Attraction]:
     """
     Rainy Day, all outdoor, nature and Sporty activities are no longer 
     available for the day
     """
     print("Rainy Day")
-    new_attraction_list = []
-    for attraction in attraction_list:
-        if "Sporty" in attraction.categories or \
-            "Nature" in attraction.categories or \
-            "Outdoor" in attraction.categories:
-            # Amend all the attraction opening hours for today
-            del attraction.opening_hours[day]
-        new_attraction_list.append(attraction)
+    if not attraction_list:
+        return []
 
-    return new_attraction_list
+    # Only close the listed attractions that are in a rainy day category
+    table = attraction_list[0].table
+    listed = np.fromiter((attraction.idx for attraction in attraction_list),
+                         dtype=np.int64, count=len(attraction_list))
+    closed = np.intersect1d(table.matching_any(RAINY_DAY_CATEGORIES), listed)
+
+    # Amend all the attraction opening hours for today
+    table.close(closed, day)
+
+    return list(attraction_list)
 
 def sick_day_attraction(attraction_list : List[Attraction], day : int):
     """
@@ -0,0 +1,86 @@
+"""
+Pairwise great circle distances (and travel times) between attractions,
+stored as a float32 .npy file keyed by the attraction file's content hash.
+Every process memory maps the same file, so parallel workers share one
+copy through the page cache
+"""
+import os
+
+import numpy as np
+
+import instance_cache
+
+EARTH_RADIUS_KM = 6371.0
+
+# Average travel speed across the city used for travel times
+DEFAULT_SPEED_KMH = 30.0
+
+# Elements per block of rows computed at once, bounds the float64 scratch
+_BLOCK_ELEMENTS = 1 << 22
+
+
+def haversine_km(lat_long_a, lat_long_b):
+    """
+    Great circle distance in km. Like the attraction csv, lat_long holds
+    (longitude, latitude) in degrees, the last axis of array inputs
+    """
+    lat_long_a = np.radians(lat_long_a)
+    lat_long_b = np.radians(lat_long_b)
+    d_lon = lat_long_b[..., 0] - lat_long_a[..., 0]
+    d_lat = lat_long_b[..., 1] - lat_long_a[..., 1]
+    h = np.sin(d_lat / 2) ** 2 + \
+        np.cos(lat_long_a[..., 1]) * np.cos(lat_long_b[..., 1]) * np.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+
+
+def haversine_matrix(lat_long : np.ndarray, out : np.ndarray = None) -> np.ndarray:
+    """
+    (n, n) float32 matrix of distances in km between the (longitude,
+    latitude) rows of lat_long, filled block by block into out when given
+    """
+    n = len(lat_long)
+    if out is None:
+        out = np.empty((n, n), dtype=np.float32)
+
+    block = max(1, _BLOCK_ELEMENTS // max(n, 1))
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        out[start:stop] = haversine_km(lat_long[start:stop, np.newaxis], lat_long[np.newaxis, :])
+    return out
+
+
+def travel_hours(distances : np.ndarray, speed_kmh : float = DEFAULT_SPEED_KMH) -> np.ndarray:
+    """
+    Travel times in hours for a distance matrix in km
+    """
+    return distances / np.float32(speed_kmh)
+
+
+def matrix_path(attraction_csv : str, cache_dir : str) -> str:
+    return os.path.join(cache_dir, "distances-{}.npy".format(instance_cache.file_hash(attraction_csv)))
+
+
+def load_or_build(attraction_csv : str, lat_long : np.ndarray, cache_dir : str) -> np.ndarray:
+    """
+    Read only memory map of the distance matrix of attraction_csv, built
+    from lat_long and written to cache_dir when missing. The file name holds
+    the content hash, so an edited csv never reads an old matrix
+    """
+    path = matrix_path(attraction_csv, cache_dir)
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        # Build next to the target and rename, so concurrent processes
+        # never map a half written matrix
+        tmp = "{}.{}.tmp".format(path, os.getpid())
+        n = len(lat_long)
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(n, n))
+        haversine_matrix(lat_long, out)
+        out.flush()
+        del out
+        os.replace(tmp, path)
+
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # No attractions, nothing to map
+        return np.load(path)
@@ -0,0 +1,162 @@
+"""
+Binary cache for parsed instance csv files. The first parse of a csv writes
+its columns as .npy files plus a small json header, later runs memory map
+the columns instead of parsing the csv again
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from typing import Callable, Dict
+
+# Bump whenever the layout of the cached columns changes
+CACHE_VERSION = 1
+
+_HEADER = "header.json"
+_HASH_CHUNK = 1 << 20
+
+
+def file_hash(path : str) -> str:
+    """
+    Content hash of the file at path
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(csv_path : str, cache_dir : str) -> str:
+    """
+    Directory holding the cache of csv_path, keyed by its absolute path
+    """
+    csv_path = os.path.abspath(csv_path)
+    key = hashlib.blake2b(csv_path.encode("utf-8"), digest_size=8).hexdigest()
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, "{}-{}".format(name, key))
+
+
+def _read_header(path : str):
+    try:
+        with open(os.path.join(path, _HEADER), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_header(path : str, header : dict) -> None:
+    # Write then rename, so a header is either missing or complete
+    tmp = os.path.join(path, _HEADER + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(header, f)
+    os.replace(tmp, os.path.join(path, _HEADER))
+
+
+def _is_fresh(header, csv_path : str, stat : os.stat_result, path : str) -> bool:
+    """
+    Check the cached header still describes the csv file. Size and mtime
+    are compared first, the content hash is only computed when the mtime
+    changed, e.g. after a checkout that touched but did not edit the file
+    """
+    if header is None or header.get("version") != CACHE_VERSION:
+        return False
+    if header["path"] != os.path.abspath(csv_path) or header["size"] != stat.st_size:
+        return False
+    if header["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    if header["hash"] != file_hash(csv_path):
+        return False
+
+    header["mtime_ns"] = stat.st_mtime_ns
+    _write_header(path, header)
+    return True
+
+
+def load(csv_path : str, cache_dir : str):
+    """
+    Load the cached columns of csv_path, or None when there is no cache or
+    it is stale. Columns are memory mapped copy on write, so in place edits
+    (e.g. disruptions closing an attraction) never reach the cache files
+    """
+    path = cache_path(csv_path, cache_dir)
+    header = _read_header(path)
+    if not _is_fresh(header, csv_path, os.stat(csv_path), path):
+        return None
+
+    return {column : _load_column(os.path.join(path, column + ".npy"))
+            for column in header["columns"]}
+
+
+def _load_column(path : str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="c")
+    except ValueError:
+        # Empty columns have no data to map
+        return np.load(path)
+
+
+def store(csv_path : str,
+          cache_dir : str,
+          columns : Dict[str, np.ndarray],
+          stat : os.stat_result,
+          content_hash : str) -> None:
+    """
+    Write the parsed columns of csv_path to the cache. stat and content_hash
+    must be taken before the csv was parsed, so an edit made while parsing
+    leaves a stale (not a wrong) cache behind
+    """
+    path = cache_path(csv_path, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Write into a fresh directory next to the target and rename it into
+    # place, so readers see either the old cache, no cache or the new one,
+    # never a half written one
+    tmp = tempfile.mkdtemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=cache_dir)
+    for column, values in columns.items():
+        np.save(os.path.join(tmp, column + ".npy"), np.ascontiguousarray(values))
+
+    _write_header(tmp, {"version" : CACHE_VERSION,
+                        "path" : os.path.abspath(csv_path),
+                        "size" : stat.st_size,
+                        "mtime_ns" : stat.st_mtime_ns,
+                        "hash" : content_hash,
+                        "columns" : list(columns)})
+
+    # Move any stale cache of the same file out of the way first, a
+    # directory cannot be renamed over a non empty one. Columns a reader
+    # already mapped stay valid after the removal
+    stale = tmp[:-len(".tmp")] + ".stale"
+    try:
+        os.rename(path, stale)
+    except FileNotFoundError:
+        pass
+
+    try:
+        os.rename(tmp, path)
+    except OSError:
+        # Another process put its cache in place in the meantime
+        shutil.rmtree(tmp, ignore_errors=True)
+    shutil.rmtree(stale, ignore_errors=True)
+
+
+def load_or_build(csv_path : str,
+                  cache_dir : str,
+                  build : Callable[[], Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Cached columns of csv_path. On a miss the columns are built with
+    build() and written to the cache first
+    """
+    columns = load(csv_path, cache_dir)
+    if columns is not None:
+        return columns
+
+    stat = os.stat(csv_path)
+    content_hash = file_hash(csv_path)
+    columns = build()
+    store(csv_path, cache_dir, columns, stat, content_hash)
+    return columns
@@ -0,0 +1,195 @@
+"""
+Placement of a tourist's must visit attractions ahead of the search. The
+must visits are spread over the touring days by a backtracking search with
+forward checking on the days left to each of them, so an instance whose
+must visits cannot all be scheduled is known before any ALNS iteration,
+together with the constraint that blocks it
+"""
+import itertools
+from collections import namedtuple
+
+import numpy as np
+
+from rcjsp import (MAX_ACTIVITIES_PER_DAY, MIN_BREAK, SLOT_HOURS, Attraction, CandidateSet,
+                   Insertion, SMJSP)
+
+# Blocking constraints reported by MustVisitInfeasible
+BUDGET = "budget"        # the must visits together cost more than is left
+HOURS = "hours"          # no touring day fits the visit in the opening hours
+CAPACITY = "capacity"    # more must visits than free visits on the days
+SCHEDULE = "schedule"    # windows and breaks cannot be met all at once
+
+# A visit to sequence within a day, start in [earliest, latest]
+_Visit = namedtuple("_Visit", ["attraction", "earliest", "latest", "task_time"])
+
+
+class MustVisitInfeasible(ValueError):
+    def __init__(self, constraint : str, names : list):
+        """
+        The must visits named cannot all be placed because of constraint,
+        one of BUDGET, HOURS, CAPACITY or SCHEDULE. For SCHEDULE
+        names is a minimal subset that already cannot be placed together
+        """
+        self.constraint = constraint
+        self.names = names
+        super().__init__("Must visit attractions {} cannot be placed, blocked by {}.".format(
+            ", ".join(names), constraint))
+
+
+def _sequence(visits : list):
+    """
+    Start times for the visits of one day in the first order (of at most
+    MAX_ACTIVITIES_PER_DAY! orders) that meets every window and break, None
+    when there is none. Each visit starts as early as possible
+    """
+    for order in itertools.permutations(visits):
+        starts = []
+        ready = -np.inf
+        for visit in order:
+            start = max(visit.earliest, np.ceil(ready / SLOT_HOURS) * SLOT_HOURS)
+            if start > visit.latest:
+                break
+            starts.append(start)
+            ready = start + visit.task_time + MIN_BREAK
+        else:
+            return list(zip(order, starts))
+    return None
+
+
+def _search(pending : list, days : dict, domains : dict):
+    """
+    Backtracking over the day of each pending must visit, the one with the
+    fewest days left first. days maps a day to the visits placed on it,
+    domains a pending visit's attraction idx to its {day : _Visit} options
+    """
+    if not pending:
+        return days
+
+    visit = min(pending, key=lambda idx: len(domains[idx]))
+    rest = [idx for idx in pending if idx != visit]
+    for day, option in domains[visit].items():
+        placed = days[day] + [option]
+        if len(placed) > MAX_ACTIVITIES_PER_DAY or _sequence(placed) is None:
+            continue
+
+        # Forward checking, drop this day from the other visits that no
+        # longer fit next to the visits now on it
+        narrowed = {idx : {other : candidate for other, candidate in domains[idx].items()
+                           if other != day or (len(placed) < MAX_ACTIVITIES_PER_DAY and
+                                               _sequence(placed + [candidate]) is not None)}
+                    for idx in rest}
+        if any(not options for options in narrowed.values()):
+            continue
+
+        found = _search(rest, {**days, day : placed}, narrowed)
+        if found is not None:
+            return found
+    return None
+
+
+def _domains(state : SMJSP, attractions : list) -> dict:
+    """
+    {day : _Visit} options of each attraction on the days it fits the
+    touring and opening hours, on the slot grid
+    """
+    candidates = state.candidates
+    if candidates is None:
+        candidates = CandidateSet(state.tourist, state.attraction_table)
+    domains = {}
+    for attraction in attractions:
+        options = {}
+        for day in candidates.days(attraction.idx):
+            if day not in state.tourist._touring_dict:
+                continue
+            earliest, latest = candidates.window(attraction.idx, day)
+            earliest = np.ceil(earliest / SLOT_HOURS) * SLOT_HOURS
+            latest = np.floor(latest / SLOT_HOURS) * SLOT_HOURS
+            if earliest <= latest:
+                options[day] = _Visit(attraction, float(earliest), float(latest), attraction.task_time)
+        domains[attraction.idx] = options
+    return domains
+
+
+def plan_must_visits(state : SMJSP, skip = ()) -> list:
+    """
+    Insertions placing every must visit not yet scheduled, around the visits
+    already on the days. Names in skip and names no attraction has (see
+    SMJSP.unknown_must_visit) are left out. Raises MustVisitInfeasible
+    naming the blocking constraint when there is no such placement
+    """
+    tourist = state.tourist
+    table = state.attraction_table
+
+    # Attraction views of the state where it has them
+    views = {attraction.idx : attraction for attraction in state.attractions}
+    pending = {}
+    for name in tourist.must_visit:
+        idx = table.find(name)
+        if idx is None or name in skip:
+            continue
+        attraction = views.get(idx) or Attraction(table, idx)
+        if tourist._placement.get(idx) is None and attraction not in tourist._visited:
+            pending[idx] = attraction
+    if not pending:
+        return []
+
+    if sum(attraction.cost for attraction in pending.values()) + tourist.money_spent > tourist.budget:
+        raise MustVisitInfeasible(BUDGET, [attraction.attraction_name for attraction in pending.values()])
+
+    domains = _domains(state, pending.values())
+    no_hours = [attraction.attraction_name for idx, attraction in pending.items() if not domains[idx]]
+    if no_hours:
+        raise MustVisitInfeasible(HOURS, no_hours)
+
+    # Visits already scheduled stay where they are
+    days = {day : [_Visit(attraction, start, start, attraction.task_time)
+                   for attraction, start in zip(timeline.attractions, timeline.starts)]
+            for day, timeline in tourist._timelines.items()}
+    for day in tourist._touring_dict:
+        days.setdefault(day, [])
+
+    free = sum(max(MAX_ACTIVITIES_PER_DAY - len(days[day]), 0) for day in tourist._touring_dict)
+    if len(pending) > free:
+        raise MustVisitInfeasible(CAPACITY, [attraction.attraction_name for attraction in pending.values()])
+
+    found = _search(list(pending), days, domains)
+    if found is None:
+        # Deletion filter, keep dropping must visits while the rest still
+        # cannot be placed, leaving a minimal conflicting set
+        conflict = list(pending)
+        for idx in list(conflict):
+            rest = [other for other in conflict if other != idx]
+            if _search(rest, days, domains) is None:
+                conflict = rest
+        raise MustVisitInfeasible(SCHEDULE, [pending[idx].attraction_name for idx in conflict])
+
+    return [Insertion(visit.attraction, day, start)
+            for day, visits in found.items() if visits
+            for visit, start in _sequence(visits) if visit.attraction.idx in pending]
+
+
+def place_must_visits(state : SMJSP, partial : bool = False) -> list:
+    """
+    Assign the insertions of plan_must_visits to the state and return them.
+    With partial, instead of raising MustVisitInfeasible the must visits it
+    names are left out, all of them for HOURS and otherwise the last one,
+    until the rest can be placed. Those left out stay missing in the
+    objective and are recorded in state.blocked_must_visit as
+    (constraint, names left out) pairs
+    """
+    skip = set()
+    blocked = []
+    while True:
+        try:
+            insertions = plan_must_visits(state, skip)
+            break
+        except MustVisitInfeasible as error:
+            if not partial:
+                raise
+            names = error.names if error.constraint == HOURS else error.names[-1:]
+            blocked.append((error.constraint, list(names)))
+            skip.update(names)
+    state.blocked_must_visit = blocked
+    for insertion in insertions:
+        state.tourist.assign(insertion.attraction, insertion.day, insertion.time)
+    return insertions
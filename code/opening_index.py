@@ -0,0 +1,106 @@
+"""
+Per day index over the attraction opening hours, answering "which
+attractions are open on day d and can be fully visited from time t" in
+O(log n + k) for k answers instead of probing every attraction
+"""
+import numpy as np
+
+# Attraction i can start its visit on day d at any time in
+# [open, close - task_time], the index stores one such interval per
+# attraction that is open long enough on that day
+
+
+class _IntervalNode(object):
+    """
+    Node of a centered interval tree, holding the intervals that contain
+    its center. They are kept sorted by start and, separately, by end
+    (descending, stored negated so both can be searched ascending)
+    """
+    __slots__ = ("center", "starts", "by_start", "neg_ends", "by_end", "left", "right")
+
+
+def _build(ids : np.ndarray, starts : np.ndarray, ends : np.ndarray):
+    if len(ids) == 0:
+        return None
+
+    node = _IntervalNode()
+    node.center = float(np.median(np.concatenate([starts, ends])))
+
+    left = ends < node.center
+    right = starts > node.center
+    here = ~(left | right)
+
+    order = np.argsort(starts[here], kind="stable")
+    node.starts = starts[here][order]
+    node.by_start = ids[here][order]
+
+    order = np.argsort(-ends[here], kind="stable")
+    node.neg_ends = -ends[here][order]
+    node.by_end = ids[here][order]
+
+    node.left = _build(ids[left], starts[left], ends[left])
+    node.right = _build(ids[right], starts[right], ends[right])
+    return node
+
+
+def _stab(node : _IntervalNode, time : float) -> list:
+    """
+    Id arrays of all intervals containing time
+    """
+    found = []
+    while node is not None:
+        if time < node.center:
+            # Every interval here ends after time, keep those starting before
+            found.append(node.by_start[:np.searchsorted(node.starts, time, side="right")])
+            node = node.left
+        elif time > node.center:
+            # Every interval here starts before time, keep those ending after
+            found.append(node.by_end[:np.searchsorted(node.neg_ends, -time, side="right")])
+            node = node.right
+        else:
+            found.append(node.by_start)
+            break
+    return found
+
+
+class OpeningHoursIndex(object):
+    def __init__(self, table):
+        """
+        Opening hours index over an AttractionTable. A day's tree is built
+        on its first query and rebuilt once the table's opening hours
+        changed, e.g. after a disruption closed attractions
+        """
+        self.table = table
+        self._trees = {}
+        self._version = table.opening_hours_version
+
+    def _tree(self, day : int):
+        if self._version != self.table.opening_hours_version:
+            self._trees = {}
+            self._version = self.table.opening_hours_version
+
+        if day not in self._trees:
+            hours = self.table.opening_hours[:, day]
+            latest_start = hours[:, 1] - self.table.task_time
+            # NaN (closed) compares false and drops out here
+            ids = np.flatnonzero(latest_start >= hours[:, 0])
+            self._trees[day] = _build(ids, hours[ids, 0], latest_start[ids])
+        return self._trees[day]
+
+    def startable(self, day : int, time : float, duration : float = None) -> np.ndarray:
+        """
+        Sorted ids of the attractions open on the day for their whole visit
+        [time, time + task_time]. With duration, only the attractions whose
+        visit also fits in [time, time + duration]
+        """
+        found = _stab(self._tree(day), time)
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        ids = np.sort(np.concatenate(found))
+
+        # Exact float check on the answers only, mirrors Tourist.can_assign
+        task_time = self.table.task_time[ids]
+        fits = time + task_time <= self.table.opening_hours[ids, day, 1]
+        if duration is not None:
+            fits &= task_time <= duration
+        return ids[fits]
@@ -0,0 +1,53 @@
+"""
+Tourist by attraction attractiveness scores, the number of a tourist's
+preferred categories an attraction belongs to, computed in bulk from the
+category bitmasks instead of per pair
+
+Preference masks only take 2 ** n_categories values, so the scores of every
+possible mask against every attraction fit in a small lookup table, and the
+score matrix of any number of tourists is a row gather from it
+"""
+import numpy as np
+
+# Elements per block of scores yielded by iter_score_blocks, bounds memory
+_BLOCK_ELEMENTS = 1 << 26
+
+# Number of set bits of every byte value
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def score_table(category_masks : np.ndarray, n_categories : int) -> np.ndarray:
+    """
+    (2 ** n_categories, n_attractions) uint8 table, entry [m, i] is the
+    score of attraction i for a tourist with preference mask m
+    """
+    if n_categories > 8:
+        raise ValueError("At most 8 categories fit the uint8 lookup, got {}.".format(n_categories))
+    masks = np.arange(1 << n_categories, dtype=np.int64)
+    category_masks = np.asarray(category_masks, dtype=np.int64)
+    return _POPCOUNT[masks[:, np.newaxis] & category_masks[np.newaxis, :]]
+
+
+def score_matrix(preference_masks : np.ndarray, table : np.ndarray) -> np.ndarray:
+    """
+    (n_tourists, n_attractions) uint8 scores of the tourists with the given
+    preference masks, table is from score_table
+    """
+    return table[np.asarray(preference_masks, dtype=np.int64)]
+
+
+def iter_score_blocks(preference_masks : np.ndarray,
+                      table : np.ndarray,
+                      max_elements : int = None):
+    """
+    Yield (start, scores) for consecutive blocks of tourists, scores being
+    the score_matrix rows [start, start + len(scores)). A block holds at
+    most max_elements scores (default _BLOCK_ELEMENTS, but at least one
+    tourist), so any number of tourists is scored in bounded memory
+    """
+    if max_elements is None:
+        max_elements = _BLOCK_ELEMENTS
+    preference_masks = np.asarray(preference_masks, dtype=np.int64)
+    rows = max(1, max_elements // max(table.shape[1], 1))
+    for start in range(0, len(preference_masks), rows):
+        yield start, table[preference_masks[start:start + rows]]
@@ -30,6 +30,9 @@ class pspAlnsEnv(gym.Env):
         self.initial_solution = None
         self.best_solution = None
         self.current_solution = None
+        # Objectives of the current and best solutions, computed once each
+        self.current_objective = None
+        self.best_objective = None
 
         # // Add code here to include other states that require reset
         # --------------------- Provided to students
@@ -72,7 +75,7 @@ class pspAlnsEnv(gym.Env):
         """
 
         is_current_best = 0
-        if self.current_solution.objective() == self.best_solution.objective():
+        if self.current_objective == self.best_objective:
             is_current_best = 1
 
         # state = np.array(
@@ -139,6 +142,7 @@ class pspAlnsEnv(gym.Env):
         self.initial_solution = psp
         self.current_solution = copy.deepcopy(self.initial_solution)
         self.best_solution = copy.deepcopy(self.initial_solution)
+        self.current_objective = self.best_objective = self.initial_solution.objective()
 
         # Adding of Destroy and Repair Operators
         # // You should import and add your operators.py functions here
@@ -201,12 +205,13 @@ class pspAlnsEnv(gym.Env):
         r_name, r_operator = self.dr_alns.repair_operators[r_idx]
         candidate = r_operator(destroyed, self.rnd_state)
 
-        new_best, new_current = self.consider_candidate(best, current, candidate)
+        candidate_objective = candidate.objective()
+        new_best, new_current = self.consider_candidate(best, current, candidate, candidate_objective)
 
-        self.reward_and_update(new_best, best, new_current, current)
+        self.reward_and_update(new_best, best, new_current, current, candidate_objective)
 
         self.cost_difference_from_best = (
-            self.current_solution.objective() / self.best_solution.objective()
+            self.current_objective / self.best_objective
         ) * 100
 
         state = self.make_observation()
@@ -217,37 +222,46 @@ class pspAlnsEnv(gym.Env):
 
         return state, self.reward, self.done, False, {}
 
-    def reward_and_update(self, new_best, best, new_current, current):
+    def reward_and_update(self, new_best, best, new_current, current, candidate_objective):
+        # Objectives known before this step, new_current is either current or
+        # the candidate, so its objective is one of these two
+        current_objective = self.current_objective
+        new_current_objective = candidate_objective if new_current is not current else current_objective
         # ------------------------------------------------------------
         # // Modify Reward Function Here as you see fit
         if new_best != best and new_best is not None:
             # found new best solution
             self.best_solution = new_best
             self.current_solution = new_best
+            self.best_objective = self.current_objective = candidate_objective
             self.current_updated = 1
             self.reward += 5
             self.stagcount = 0
             self.current_improved = 1
 
-        elif new_current != current and new_current.objective() > current.objective():
+        elif new_current != current and new_current_objective > current_objective:
             # solution accepted
             self.current_solution = new_current
+            self.current_objective = new_current_objective
             self.current_updated = 1
             self.current_improved = 1
 
-        elif new_current != current and new_current.objective() <= current.objective():
+        elif new_current != current and new_current_objective <= current_objective:
             self.current_solution = new_current
+            self.current_objective = new_current_objective
             self.current_updated = 1
 
-        if new_current.objective() > current.objective():
+        if new_current_objective > current_objective:
             self.improvement = 1
         # ------------------------------------------------------------
 
-    def consider_candidate(self, best, curr, cand):
+    def consider_candidate(self, best, curr, cand, cand_objective):
         # -----------------------------------------------------
         # // Modify acceptance criteria as you see fit
-        # Hill Climbing
-        if cand.objective() < best.objective():
+        # Hill Climbing, cand_objective is cand.objective() and the objectives
+        # of best and curr are kept in self.best_objective and
+        # self.current_objective, so no solution is evaluated twice
+        if cand_objective < self.best_objective:
             return cand, cand
         else:
             return None, curr
@@ -309,8 +323,8 @@ class pspAlnsEnv(gym.Env):
                     "step {}, action: {}, Current: {}, Best: {}, Reward: {:2.3f}".format(
                         self.iteration,
                         action,
-                        self.current_solution.objective(),
-                        self.best_solution.objective(),
+                        self.current_objective,
+                        self.best_objective,
                         reward,
                     )
                 )
@@ -0,0 +1,139 @@
+"""
+Uniform grid index over attraction coordinates, for the "k nearest
+attractions" and "attractions within r km" queries of relatedness based
+destroy operators and granular insertion
+"""
+import math
+
+import numpy as np
+
+from distance_matrix import EARTH_RADIUS_KM, haversine_km
+
+# Average number of attractions per grid cell
+_POINTS_PER_CELL = 4
+
+
+class GridIndex(object):
+    def __init__(self, lat_long : np.ndarray, cell_degrees : float = None):
+        """
+        Bucket the (longitude, latitude) rows of lat_long, e.g.
+        AttractionTable.lat_long, into square cells of cell_degrees. The
+        default cell size holds about _POINTS_PER_CELL points per cell.
+        Queries return row indices of lat_long
+        """
+        self.lat_long = np.asarray(lat_long, dtype=np.float64)
+        n = len(self.lat_long)
+
+        if n:
+            self.low = self.lat_long.min(axis=0)
+            self.high = self.lat_long.max(axis=0)
+            self.max_abs_lat = float(np.abs(self.lat_long[:, 1]).max())
+        else:
+            self.low = np.zeros(2)
+            self.high = np.zeros(2)
+            self.max_abs_lat = 0.0
+        span = self.high - self.low
+
+        if cell_degrees is None:
+            area = max(span[0], 1e-6) * max(span[1], 1e-6)
+            cell_degrees = math.sqrt(area * _POINTS_PER_CELL / max(n, 1))
+        self.cell_degrees = cell_degrees
+        self.shape = (int(span[0] // cell_degrees) + 1, int(span[1] // cell_degrees) + 1)
+
+        # Points sorted by cell, cell c owns order[cell_start[c]:cell_start[c + 1]].
+        # Cells are numbered column by column, so the cells of one column of
+        # a query box are one contiguous slice
+        cells = self._cell_ids(self.lat_long)
+        self.order = np.argsort(cells, kind="stable")
+        self.cell_start = np.searchsorted(cells[self.order], np.arange(self.shape[0] * self.shape[1] + 1))
+
+    def __len__(self) -> int:
+        return len(self.lat_long)
+
+    def _cell_coords(self, lat_long : np.ndarray) -> np.ndarray:
+        coords = np.floor((lat_long - self.low) / self.cell_degrees).astype(np.int64)
+        return np.clip(coords, 0, np.array(self.shape) - 1)
+
+    def _cell_ids(self, lat_long : np.ndarray) -> np.ndarray:
+        coords = self._cell_coords(lat_long)
+        return coords[:, 0] * self.shape[1] + coords[:, 1]
+
+    def _box(self, point : np.ndarray, radius_km : float) -> np.ndarray:
+        """
+        Ids of all points in the cells covering every location within
+        radius_km of point
+        """
+        d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        # Pairs at most radius_km apart differ by at most d_lon in
+        # longitude, from the haversine formula at the highest latitude
+        cos_lat = math.cos(math.radians(min(90.0, max(self.max_abs_lat, abs(point[1])) + d_lat)))
+        ratio = math.sin(min(radius_km / (2 * EARTH_RADIUS_KM), math.pi / 2)) / max(cos_lat, 1e-12)
+        d_lon = 180.0 if ratio >= 1 else math.degrees(2 * math.asin(ratio))
+
+        low_y = self._cell_coords(np.array([[self.low[0], point[1] - d_lat]]))[0, 1]
+        high_y = self._cell_coords(np.array([[self.low[0], point[1] + d_lat]]))[0, 1]
+
+        # Longitudes wrap around, the box may also reach the points a turn
+        # of 360 degrees to either side of the query in [-180, 180)
+        lon = (point[0] + 180.0) % 360.0 - 180.0
+        columns = set()
+        for shift in (-360.0, 0.0, 360.0):
+            west, east = lon - d_lon + shift, lon + d_lon + shift
+            if east < self.low[0] or west > self.high[0]:
+                continue
+            low_x = self._cell_coords(np.array([[west, self.low[1]]]))[0, 0]
+            high_x = self._cell_coords(np.array([[east, self.low[1]]]))[0, 0]
+            columns.update(range(low_x, high_x + 1))
+
+        slices = [np.empty(0, dtype=self.order.dtype)]
+        for x in sorted(columns):
+            first = x * self.shape[1]
+            slices.append(self.order[self.cell_start[first + low_y]:self.cell_start[first + high_y + 1]])
+        return np.concatenate(slices)
+
+    def radius(self, points : np.ndarray, radius_km : float) -> list:
+        """
+        For every (longitude, latitude) row of points, the sorted ids of the
+        indexed points within radius_km
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        found = []
+        for point in points:
+            ids = self._box(point, radius_km)
+            ids = ids[haversine_km(point, self.lat_long[ids]) <= radius_km]
+            found.append(np.sort(ids))
+        return found
+
+    def knn(self, points : np.ndarray, k : int):
+        """
+        The k nearest indexed points of every (longitude, latitude) row of
+        points. Returns (len(points), k) arrays of ids and distances in km,
+        nearest first. k is capped at the number of indexed points
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        k = min(k, len(self))
+        ids = np.empty((len(points), k), dtype=np.int64)
+        distances = np.empty((len(points), k), dtype=np.float64)
+        if k == 0:
+            return ids, distances
+
+        # First guess, the radius of a circle expected to hold 2k points
+        span_km = math.radians(self.cell_degrees) * EARTH_RADIUS_KM
+        start_km = max(span_km * math.sqrt(2 * k / _POINTS_PER_CELL), 1e-3)
+
+        for row, point in enumerate(points):
+            radius_km = start_km
+            while True:
+                candidates = self._box(point, radius_km)
+                if len(candidates) >= k:
+                    candidate_km = haversine_km(point, self.lat_long[candidates])
+                    nearest = np.argpartition(candidate_km, k - 1)[:k]
+                    # Only exact once the k-th nearest lies within the box
+                    if candidate_km[nearest].max() <= radius_km or len(candidates) == len(self):
+                        break
+                radius_km *= 2
+
+            nearest = nearest[np.argsort(candidate_km[nearest], kind="stable")]
+            ids[row] = candidates[nearest]
+            distances[row] = candidate_km[nearest]
+        return ids, distances
@@ -1,3 +1,4 @@
+import time
 import warnings
 from collections import OrderedDict
 
@@ -8,6 +9,7 @@ from .Result import Result
 from .State import State  # pylint: disable=unused-import
 from .Statistics import Statistics
 from .criteria import AcceptanceCriterion  # pylint: disable=unused-import
+from .stopping import StoppingCriterion  # pylint: disable=unused-import
 from .select_operator import select_operator
 from .tools.warnings import OverwriteWarning
 
@@ -23,6 +25,9 @@ _IS_REJECTED = 3
 # Callbacks
 _ON_BEST = 0
 
+# Stop reason when all iterations ran
+_MAX_ITERATIONS = "max_iterations"
+
 
 class ALNS:
 
@@ -52,6 +57,11 @@ class ALNS:
         self._repair_operators = OrderedDict()
         self._callbacks = {}
 
+        # Optional (interval, exchange) pair. Every interval iterations the
+        # best and current states are replaced by exchange(best, current),
+        # used by ParallelALNS to migrate states between islands.
+        self._exchange = None
+
         self._rnd_state = rnd_state
 
     @property
@@ -113,7 +123,8 @@ class ALNS:
         self._add_operator(self._repair_operators, operator, name)
 
     def iterate(self, initial_solution, weights, operator_decay, criterion,
-                iterations=10000, collect_stats=True):
+                iterations=10000, collect_stats=True, num_candidates=1,
+                executor=None, stop=None, progress=True):
         """
         Runs the adaptive large neighbourhood search heuristic [1], using the
         previously set destroy and repair operators. The first solution is set
@@ -137,9 +148,28 @@ class ALNS:
             the `alns.criteria` module for an overview.
         iterations : int
             The number of iterations. Default 10000.
-        collect_stats : bool
+        collect_stats : bool or Statistics
             Should statistics be collected during iteration? Default True, but
-            may be turned off for long runs to reduce memory consumption.
+            may be turned off for long runs to reduce memory consumption. A
+            Statistics object may also be passed to collect into, e.g. one
+            that keeps a window of recent objectives and records only.
+        num_candidates : int
+            Number of candidate solutions computed in each iteration, each by
+            its own independently selected destroy and repair operator pair.
+            The best candidate is considered for acceptance, and the weights
+            of every pair tried are updated. Default 1.
+        executor : Executor
+            Optional ``concurrent.futures`` executor (thread or process pool)
+            on which the candidates of an iteration are computed concurrently.
+            When not passed, they are computed one after the other. A process
+            pool requires picklable operators and states.
+        stop : StoppingCriterion
+            Optional stopping criterion, checked before every iteration. See
+            also the `alns.stopping` module for an overview. The iterations
+            parameter still bounds the number of iterations.
+        progress : bool
+            Should a progress bar be shown? Default True, but may be turned
+            off e.g. when many runs share a terminal.
 
         Raises
         ------
@@ -149,8 +179,8 @@ class ALNS:
         Returns
         -------
         Result
-            A result object, containing the best solution and some additional
-            statistics.
+            A result object, containing the best solution, the reason the
+            iteration stopped and some additional statistics.
 
         References
         ----------
@@ -164,50 +194,91 @@ class ALNS:
         """
         weights = np.asarray(weights, dtype=np.float16)
 
-        self._validate_parameters(weights, operator_decay, iterations)
+        self._validate_parameters(weights, operator_decay, iterations,
+                                  num_candidates)
 
-        current = best = initial_solution
+        # The loop works on evaluated states, so that every state's objective
+        # is computed only once, no matter how often it is compared.
+        current = best = _Evaluated(initial_solution)
 
         d_weights = np.ones(len(self.destroy_operators), dtype=np.float16)
         r_weights = np.ones(len(self.repair_operators), dtype=np.float16)
 
-        statistics = Statistics()
+        if isinstance(collect_stats, Statistics):
+            statistics = collect_stats
+            collect_stats = True
+        else:
+            statistics = Statistics()
 
         if collect_stats:
-            statistics.collect_objective(initial_solution.objective())
+            statistics.collect_objective(current.objective())
+
+        stop_reason = _MAX_ITERATIONS
+
+        for iteration in tqdm(range(iterations), disable=not progress):
+            start = time.perf_counter()
+
+            if stop is not None and stop(self._rnd_state, best, current):
+                stop_reason = stop.reason
+                break
 
-        for iteration in tqdm(range(iterations)):
-            d_idx = select_operator(self.destroy_operators, d_weights,
-                                    self._rnd_state)
+            pairs = [(select_operator(self.destroy_operators, d_weights,
+                                      self._rnd_state),
+                      select_operator(self.repair_operators, r_weights,
+                                      self._rnd_state))
+                     for _ in range(num_candidates)]
 
-            r_idx = select_operator(self.repair_operators, r_weights,
-                                    self._rnd_state)
+            candidates = [_Evaluated(candidate) for candidate
+                          in self._compute_candidates(current.state, pairs,
+                                                      executor)]
 
-            d_name, d_operator = self.destroy_operators[d_idx]
-            destroyed = d_operator(current, self._rnd_state)
+            # Only the best candidate is considered for acceptance. The other
+            # pairs are rewarded when their candidate improves on the current
+            # state this iteration started from, and rejected otherwise.
+            chosen = min(range(num_candidates),
+                         key=lambda idx: candidates[idx].objective())
 
-            r_name, r_operator = self.repair_operators[r_idx]
-            candidate = r_operator(destroyed, self._rnd_state)
+            outcomes = [_IS_BETTER
+                        if candidates[idx].objective() < current.objective()
+                        else _IS_REJECTED for idx in range(num_candidates)]
 
-            best, current, weight_idx = self._consider_candidate(best,
-                                                                 current,
-                                                                 candidate,
-                                                                 criterion)
+            best, current, outcomes[chosen] = self._consider_candidate(
+                best, current, candidates[chosen], criterion)
 
-            # The weights are updated as convex combinations of the current
-            # weight and the update parameter. See eq. (2), p. 12.
-            d_weights[d_idx] *= operator_decay
-            d_weights[d_idx] += (1 - operator_decay) * weights[weight_idx]
+            runtime = time.perf_counter() - start
 
-            r_weights[r_idx] *= operator_decay
-            r_weights[r_idx] += (1 - operator_decay) * weights[weight_idx]
+            for (d_idx, r_idx), weight_idx in zip(pairs, outcomes):
+                # The weights are updated as convex combinations of the
+                # current weight and the update parameter. See eq. (2), p. 12.
+                d_weights[d_idx] *= operator_decay
+                d_weights[d_idx] += (1 - operator_decay) * weights[weight_idx]
+
+                r_weights[r_idx] *= operator_decay
+                r_weights[r_idx] += (1 - operator_decay) * weights[weight_idx]
+
+                if collect_stats:
+                    d_name, _ = self.destroy_operators[d_idx]
+                    r_name, _ = self.repair_operators[r_idx]
+
+                    statistics.collect_destroy_operator(d_name, weight_idx)
+                    statistics.collect_repair_operator(r_name, weight_idx)
+                    statistics.collect_record(iteration, d_idx, r_idx,
+                                              weight_idx, runtime)
 
             if collect_stats:
                 statistics.collect_objective(current.objective())
-                statistics.collect_destroy_operator(d_name, weight_idx)
-                statistics.collect_repair_operator(r_name, weight_idx)
 
-        return Result(best, statistics if collect_stats else None)
+            if self._exchange is not None:
+                interval, exchange = self._exchange
+
+                if (iteration + 1) % interval == 0 and iteration + 1 < iterations:
+                    new_best, new_current = exchange(best.state, current.state)
+
+                    best = _Evaluated.of(best, new_best)
+                    current = _Evaluated.of(current, new_current)
+
+        return Result(best.state, statistics if collect_stats else None,
+                      stop_reason)
 
     def on_best(self, func):
         """
@@ -263,6 +334,50 @@ class ALNS:
 
         operators[name] = operator
 
+    def _compute_candidates(self, current, pairs, executor):
+        """
+        Computes a candidate solution from the current solution for each of
+        the passed-in (destroy, repair) operator index pairs.
+
+        Parameters
+        ----------
+        current : State
+            Current solution.
+        pairs : list
+            List of (destroy index, repair index) tuples.
+        executor : Executor
+            Optional executor to compute the candidates on.
+
+        Returns
+        -------
+        list
+            The candidate solutions, in the order of the pairs.
+        """
+        if len(pairs) == 1 and executor is None:
+            (d_idx, r_idx), = pairs
+            _, d_operator = self.destroy_operators[d_idx]
+            _, r_operator = self.repair_operators[r_idx]
+
+            return [_apply_operators(d_operator, r_operator, current,
+                                     self._rnd_state)]
+
+        # Each candidate gets its own random state, seeded from ours, so the
+        # outcome does not depend on the order in which candidates complete.
+        seeds = self._rnd_state.randint(np.iinfo(np.int32).max,
+                                        size=len(pairs))
+
+        tasks = [(self.destroy_operators[d_idx][1],
+                  self.repair_operators[r_idx][1],
+                  current,
+                  rnd.RandomState(seed))
+                 for (d_idx, r_idx), seed in zip(pairs, seeds)]
+
+        if executor is None:
+            return [_apply_operators(*task) for task in tasks]
+
+        futures = [executor.submit(_apply_operators, *task) for task in tasks]
+        return [future.result() for future in futures]
+
     def _consider_candidate(self, best, current, candidate, criterion):
         """
         Considers the candidate solution by comparing it against the best and
@@ -272,20 +387,20 @@ class ALNS:
 
         Parameters
         ----------
-        best : State
+        best : _Evaluated
             Best solution encountered so far.
-        current : State
+        current : _Evaluated
             Current solution.
-        candidate : State
+        candidate : _Evaluated
             Candidate solution.
         criterion : AcceptanceCriterion
             The chosen acceptance criterion.
 
         Returns
         -------
-        State
+        _Evaluated
             The (possibly new) best state.
-        State
+        _Evaluated
             The (possibly new) current state.
         int
             The weight index to use when updating the operator weights.
@@ -305,7 +420,8 @@ class ALNS:
             # improve the solution.
             if _ON_BEST in self._callbacks:
                 callback = self._callbacks[_ON_BEST]
-                candidate = callback(candidate, self._rnd_state)
+                candidate = _Evaluated(callback(candidate.state,
+                                                self._rnd_state))
 
             # Global best solution becomes the new starting point for further
             # iterations.
@@ -315,7 +431,8 @@ class ALNS:
         # have (if the candidate was accepted).
         return best, current, weight
 
-    def _validate_parameters(self, weights, operator_decay, iterations):
+    def _validate_parameters(self, weights, operator_decay, iterations,
+                             num_candidates=1):
         """
         Helper method to validate the passed-in ALNS parameters.
         """
@@ -338,6 +455,9 @@ class ALNS:
         if iterations < 0:
             raise ValueError("Negative number of iterations.")
 
+        if num_candidates < 1:
+            raise ValueError("Need at least one candidate per iteration.")
+
     def _set_callback(self, flag, func):
         """
         Sets the passed-in callback func for the passed-in flag. Warns if this
@@ -350,3 +470,43 @@ class ALNS:
                           OverwriteWarning)
 
         self._callbacks[flag] = func
+
+
+def _apply_operators(d_operator, r_operator, state, rnd_state):
+    """
+    Applies the destroy and then the repair operator to the passed-in state,
+    and returns the candidate solution. Module level, so it can be submitted
+    to a process pool.
+    """
+    return r_operator(d_operator(state, rnd_state), rnd_state)
+
+
+class _Evaluated(State):
+    """
+    A state together with its objective value, which is computed once on
+    construction. Attribute access is passed on to the state, so that
+    acceptance and stopping criteria can use it as they would the state.
+    States are not changed once evaluated: operators work on a copy, or roll
+    back their changes.
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self._objective = state.objective()
+
+    @classmethod
+    def of(cls, evaluated, state):
+        """
+        Returns evaluated when it holds the passed-in state, and otherwise
+        evaluates the state.
+        """
+        return evaluated if evaluated.state is state else cls(state)
+
+    def objective(self):
+        return self._objective
+
+    def __getattr__(self, name):
+        if name == "state":  # not yet set, e.g. while copying or unpickling
+            raise AttributeError(name)
+
+        return getattr(self.state, name)
@@ -0,0 +1,248 @@
+import copy
+import multiprocessing
+import queue
+import traceback
+
+import numpy.random as rnd
+from tqdm import tqdm
+
+from .Result import Result
+from .Statistics import Statistics
+
+# Messages from the islands to the coordinating process
+_MIGRATE = 0
+_DONE = 1
+_FAILED = 2
+
+# Seconds between checks that the islands are still alive
+_POLL_INTERVAL = 1.
+
+
+class ParallelALNS:
+
+    def __init__(self, alns, num_islands=None, migration_interval=100,
+                 seed=None):
+        """
+        Island model parallel ALNS. Every island runs the passed-in ALNS
+        instance (its operators and callbacks) in a separate process, with
+        its own random state. Every ``migration_interval`` iterations the
+        islands synchronise: the best state over all islands is sent to each
+        island, which adopts it as its best and current state when it
+        improves on its own best.
+
+        Parameters
+        ----------
+        alns : ALNS
+            The ALNS instance each island runs a copy of.
+        num_islands : int
+            Number of islands (processes). Default the number of CPUs.
+        migration_interval : int
+            Number of iterations between migrations. Default 100.
+        seed : int
+            Optional seed. The random states of the islands are derived from
+            it, so that runs with the same seed give the same result.
+
+        Note
+        ----
+        Processes are forked where the platform supports it, so operators
+        may be lambdas or closures. Elsewhere they are started fresh, and
+        operators, criteria and states must be picklable. States are always
+        pickled when they migrate.
+        """
+        if num_islands is None:
+            num_islands = multiprocessing.cpu_count()
+
+        if num_islands < 1:
+            raise ValueError("Need at least one island.")
+
+        if migration_interval < 1:
+            raise ValueError("Migration interval must be positive.")
+
+        self._alns = alns
+        self._num_islands = num_islands
+        self._migration_interval = migration_interval
+        self._seed = seed
+
+    @property
+    def num_islands(self):
+        """
+        Returns the number of islands.
+
+        Returns
+        -------
+        int
+            Number of islands.
+        """
+        return self._num_islands
+
+    def iterate(self, initial_solution, weights, operator_decay, criterion,
+                iterations=10000, collect_stats=True, stop=None, progress=True):
+        """
+        Runs ALNS on every island, starting from the same initial solution.
+        Parameters are as for ``ALNS.iterate``, except for criterion.
+
+        Parameters
+        ----------
+        criterion : AcceptanceCriterion or list
+            A single acceptance criterion, of which every island gets its own
+            copy, or a list with one criterion per island.
+        stop : StoppingCriterion
+            Optional stopping criterion, of which every island gets its own
+            copy. An island that stops early no longer takes part in the
+            migrations.
+        progress : bool
+            Should a progress bar be shown? The islands never show their
+            own, this single bar advances with the migrations. Default True.
+
+        Raises
+        ------
+        ValueError
+            When the parameters do not meet requirements.
+        RuntimeError
+            When an island fails. The message holds the island's traceback.
+
+        Returns
+        -------
+        Result
+            The best solution over all islands, with the stop reason of the
+            island that found it, and their statistics merged with
+            ``Statistics.merge`` when collected.
+        """
+        if isinstance(criterion, (list, tuple)):
+            if len(criterion) != self._num_islands:
+                raise ValueError("Expected {0} criteria, one per island, found"
+                                 " {1}.".format(self._num_islands,
+                                                len(criterion)))
+
+            criteria = list(criterion)
+        else:
+            criteria = [copy.deepcopy(criterion)
+                        for _ in range(self._num_islands)]
+
+        # Surfaces invalid parameters here, rather than in every island.
+        self._alns._validate_parameters(weights, operator_decay, iterations)
+
+        seeds = rnd.SeedSequence(self._seed).spawn(self._num_islands)
+
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            context = multiprocessing.get_context("spawn")
+
+        outbox = context.Queue()
+        inboxes = [context.Queue() for _ in range(self._num_islands)]
+        islands = [context.Process(target=_run_island,
+                                   args=(self._alns, idx, seeds[idx],
+                                         initial_solution, weights,
+                                         operator_decay, criteria[idx],
+                                         iterations, collect_stats,
+                                         copy.deepcopy(stop),
+                                         self._migration_interval,
+                                         outbox, inboxes[idx]),
+                                   daemon=True)
+                   for idx in range(self._num_islands)]
+
+        for island in islands:
+            island.start()
+
+        bar = tqdm(total=iterations, disable=not progress)
+
+        try:
+            results = self._coordinate(outbox, inboxes, islands, bar)
+            bar.update(bar.total - bar.n)  # the rounds after the last migration
+        finally:
+            bar.close()
+
+            for island in islands:
+                if island.is_alive():
+                    island.terminate()
+
+                island.join()
+
+        # Ties go to the lowest island index, which keeps runs reproducible.
+        best = min(sorted(results), key=lambda idx: results[idx][0].objective())
+        best, _, stop_reason = results[best]
+
+        if not collect_stats:
+            return Result(best, stop_reason=stop_reason)
+
+        statistics = Statistics.merge(results[idx][1]
+                                      for idx in range(self._num_islands))
+
+        return Result(best, statistics, stop_reason)
+
+    def _coordinate(self, outbox, inboxes, islands, bar):
+        """
+        Collects the islands' messages until all are done. Once every island
+        that is still running sent its best state, the best of those is sent
+        back to them, and the progress bar advances. Raises when an island exits without reporting, e.g.
+        when it was killed or its result could not be pickled.
+        """
+        active = set(range(len(inboxes)))
+        migrants = {}
+        results = {}
+
+        while active:
+            try:
+                message, idx, *payload = outbox.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                for idx in active:
+                    if islands[idx].exitcode is not None:
+                        raise RuntimeError("Island {0} exited with code {1}"
+                                           " without a result."
+                                           .format(idx, islands[idx].exitcode))
+                continue
+
+            if message == _FAILED:
+                raise RuntimeError("Island {0} failed:\n{1}".format(idx,
+                                                                    *payload))
+
+            if message == _DONE:
+                active.discard(idx)
+                results[idx] = payload
+            else:
+                migrants[idx] = payload[0]
+
+            if migrants and len(migrants) == len(active):
+                source = min(sorted(migrants),
+                             key=lambda idx: migrants[idx].objective())
+
+                for idx in migrants:
+                    inboxes[idx].put(migrants[source])
+
+                migrants = {}
+                bar.update(min(self._migration_interval, bar.total - bar.n))
+
+        return results
+
+
+def _run_island(alns, idx, seed, initial_solution, weights, operator_decay,
+                criterion, iterations, collect_stats, stop, migration_interval,
+                outbox, inbox):
+    """
+    Process target running a single island, see ``ParallelALNS.iterate``.
+    """
+    try:
+        island = copy.copy(alns)
+        island._rnd_state = rnd.RandomState(rnd.MT19937(seed))
+
+        def exchange(best, current):
+            outbox.put((_MIGRATE, idx, best))
+            migrant = inbox.get()
+
+            if migrant.objective() < best.objective():
+                return migrant, migrant
+
+            return best, current
+
+        island._exchange = (migration_interval, exchange)
+
+        result = island.iterate(initial_solution, weights, operator_decay,
+                                criterion, iterations, collect_stats,
+                                stop=stop, progress=False)
+
+        statistics = result.statistics if collect_stats else None
+        outbox.put((_DONE, idx, result.best_state, statistics,
+                    result.stop_reason))
+    except BaseException:
+        outbox.put((_FAILED, idx, traceback.format_exc()))
@@ -9,7 +9,7 @@ from .tools.exceptions import NotCollectedError
 
 class Result:
 
-    def __init__(self, best, statistics=None):
+    def __init__(self, best, statistics=None, stop_reason=None):
         """
         Stores ALNS results. An instance of this class is returned once the
         algorithm completes.
@@ -20,9 +20,13 @@ class Result:
             The best state observed during the entire iteration.
         statistics : Statistics
             Statistics optionally collected during iteration.
+        stop_reason : str
+            Optional reason the iteration stopped, e.g. 'max_iterations' or
+            the reason of the stopping criterion that ended it.
         """
         self._best = best
         self._statistics = statistics
+        self._stop_reason = stop_reason
 
     @property
     def best_state(self):
@@ -36,6 +40,18 @@ class Result:
         """
         return self._best
 
+    @property
+    def stop_reason(self):
+        """
+        The reason the iteration stopped.
+
+        Returns
+        -------
+        str
+            The stop reason, or None when not recorded.
+        """
+        return self._stop_reason
+
     @property
     def statistics(self):
         """
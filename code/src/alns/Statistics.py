@@ -1,26 +1,168 @@
-from collections import defaultdict
+import os
+import tempfile
+import weakref
 
 import numpy as np
 
+# Per-iteration record of an operator pair, see Statistics.records
+RECORD_DTYPE = np.dtype([("iteration", np.int64),
+                         ("destroy", np.int32),
+                         ("repair", np.int32),
+                         ("outcome", np.int8),
+                         ("runtime", np.float64)])
+
+# Number of outcomes counted per operator
+_NUM_OUTCOMES = 4
+
+# Initial number of values a buffer has room for
+_INITIAL_CAPACITY = 1024
+
+
+class _Buffer:
+
+    def __init__(self, dtype, window=None, spill_dir=None):
+        """
+        Growable typed array that values are appended to. With a window only
+        (at least) the last window values are kept: once the buffer holds
+        twice the window, the last window values are moved to the front of
+        a new array, so that the kept values always form a contiguous array.
+        With a spill directory the values are kept in memory-mapped files
+        there, each removed again once no array uses it.
+        """
+        self._dtype = np.dtype(dtype)
+        self._window = window
+        self._spill_dir = spill_dir
+        self._size = 0
+        self._dropped = 0
+
+        if window is None:
+            self._data = self._allocate(_INITIAL_CAPACITY)
+        else:
+            self._data = self._allocate(2 * window)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def dropped(self):
+        """
+        Number of values that no longer fit the window.
+        """
+        return self._dropped
+
+    def view(self):
+        """
+        Read-only array of the kept values, without copying them. The view
+        is not updated by later appends, which never write to the part of
+        an array that was handed out.
+        """
+        view = self._data[:self._size].view(np.ndarray)
+        view.flags.writeable = False
+        return view
+
+    def append(self, value):
+        if self._size == len(self._data):
+            self._make_room()
+
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def _make_room(self):
+        # Always into a new array, as views of the current one may be out.
+        if self._window is not None:
+            data = self._allocate(2 * self._window)
+            data[:self._window] = self._data[self._size - self._window:]
+            self._dropped += self._size - self._window
+            self._size = self._window
+        else:
+            data = self._allocate(2 * len(self._data))
+            data[:self._size] = self._data
+
+        self._data = data
+
+    def _allocate(self, capacity):
+        """
+        Returns an array for capacity values, in a new file in the spill
+        directory when there is one.
+        """
+        if self._spill_dir is None:
+            return np.empty(capacity, dtype=self._dtype)
+
+        handle, path = tempfile.mkstemp(prefix="alns-", suffix=".bin",
+                                        dir=self._spill_dir)
+
+        with os.fdopen(handle, "r+b") as file:
+            file.truncate(capacity * self._dtype.itemsize)
+
+        data = np.memmap(path, dtype=self._dtype, mode="r+",
+                         shape=(capacity,))
+        weakref.finalize(data, os.remove, path)
+        return data
+
+    def __getstate__(self):
+        # Pickled, e.g. by a ParallelALNS island, as a plain array in memory.
+        state = self.__dict__.copy()
+        state["_data"] = np.array(self._data)
+        state["_spill_dir"] = None
+        return state
+
 
 class Statistics:
 
-    def __init__(self):
+    def __init__(self, window=None, spill_dir=None):
         """
         Statistics object that stores some iteration results, which is
-        optionally populated by the ALNS algorithm.
+        optionally populated by the ALNS algorithm. Objectives and records
+        are kept in typed arrays, which may be bounded for long runs.
+
+        Parameters
+        ----------
+        window : int
+            Optional number of most recent objectives and records to keep.
+            When not passed, all are kept. Operator counts always cover the
+            entire run.
+        spill_dir : str
+            Optional directory in which objectives and records are kept in
+            memory-mapped files rather than in memory. The files are removed
+            again with the Statistics object, or later when objectives or
+            records taken from it still use them.
         """
-        self._objectives = []
+        if window is not None and window < 1:
+            raise ValueError("Window must be positive.")
 
-        self._destroy_operator_counts = defaultdict(lambda: [0, 0, 0, 0])
-        self._repair_operator_counts = defaultdict(lambda: [0, 0, 0, 0])
+        self._objectives = _Buffer(np.float64, window, spill_dir)
+        self._records = _Buffer(RECORD_DTYPE, window, spill_dir)
+
+        self._destroy_operator_counts = _Counts()
+        self._repair_operator_counts = _Counts()
 
     @property
     def objectives(self):
         """
         Returns an array of previous objective values, tracking progress.
+        This is a read-only view on the collected values, not a copy.
+        """
+        return self._objectives.view()
+
+    @property
+    def records(self):
         """
-        return np.array(self._objectives)
+        Returns the per-iteration records as a read-only structured array,
+        with one record for each operator pair applied. The fields are the
+        iteration, the destroy and repair operator indices (in the order of
+        the ALNS instance's operators), the outcome (a weight index) and the
+        runtime of the iteration in seconds.
+
+        Returns
+        -------
+        np.ndarray
+            Structured array of RECORD_DTYPE.
+        """
+        return self._records.view()
 
     @property
     def destroy_operator_counts(self):
@@ -32,10 +174,10 @@ class Statistics:
 
         Returns
         -------
-        defaultdict
-            Destroy operator counts.
+        dict
+            Destroy operator counts, as read-only arrays.
         """
-        return self._destroy_operator_counts
+        return self._destroy_operator_counts.as_dict()
 
     @property
     def repair_operator_counts(self):
@@ -47,10 +189,10 @@ class Statistics:
 
         Returns
         -------
-        defaultdict
-            Repair operator counts.
+        dict
+            Repair operator counts, as read-only arrays.
         """
-        return self._repair_operator_counts
+        return self._repair_operator_counts.as_dict()
 
     def collect_objective(self, objective):
         """
@@ -77,7 +219,7 @@ class Statistics:
         weight_idx : int
             Weight indices used for the various iteration outcomes.
         """
-        self._destroy_operator_counts[operator_name][weight_idx] += 1
+        self._destroy_operator_counts.add(operator_name, weight_idx)
 
     def collect_repair_operator(self, operator_name, weight_idx):
         """
@@ -93,4 +235,100 @@ class Statistics:
         weight_idx : int
             Weight indices used for the various iteration outcomes.
         """
-        self._repair_operator_counts[operator_name][weight_idx] += 1
+        self._repair_operator_counts.add(operator_name, weight_idx)
+
+    def collect_record(self, iteration, d_idx, r_idx, weight_idx, runtime):
+        """
+        Collects a record of an operator pair applied in an iteration.
+
+        Parameters
+        ----------
+        iteration : int
+            The iteration the operators were applied in.
+        d_idx : int
+            Index of the destroy operator.
+        r_idx : int
+            Index of the repair operator.
+        weight_idx : int
+            Weight index of the outcome.
+        runtime : float
+            Runtime of the iteration, in seconds.
+        """
+        self._records.append((iteration, d_idx, r_idx, weight_idx, runtime))
+
+    @classmethod
+    def merge(cls, statistics):
+        """
+        Combines the statistics of several independent runs, e.g. the islands
+        of a ParallelALNS run. The merged objective at each iteration is the
+        lowest current objective over the runs, where a run that stopped
+        early keeps its last objective. Operator counts are summed. Records
+        are not merged.
+
+        Parameters
+        ----------
+        statistics : iterable of Statistics
+            The statistics to merge.
+
+        Returns
+        -------
+        Statistics
+            The merged statistics.
+        """
+        statistics = list(statistics)
+        merged = cls()
+        objectives = [stats.objectives for stats in statistics]
+
+        length = max((len(values) for values in objectives), default=0)
+        padded = [np.pad(values, (0, length - len(values)), mode="edge")
+                  for values in objectives if len(values) > 0]
+
+        if padded:
+            merged._objectives.extend(np.min(padded, axis=0))
+
+        for stats in statistics:
+            merged._destroy_operator_counts.update(
+                stats._destroy_operator_counts)
+            merged._repair_operator_counts.update(
+                stats._repair_operator_counts)
+
+        return merged
+
+
+class _Counts:
+
+    def __init__(self):
+        """
+        Outcome counts of named operators, as rows of an integer array in the
+        order in which the operators were first counted.
+        """
+        self._rows = {}
+        self._counts = np.zeros((0, _NUM_OUTCOMES), dtype=np.int64)
+
+    def _row(self, name):
+        row = self._rows.get(name)
+
+        if row is None:
+            row = self._rows[name] = len(self._rows)
+
+            if row == len(self._counts):
+                counts = np.zeros((max(2 * row, 4), _NUM_OUTCOMES),
+                                  dtype=np.int64)
+                counts[:row] = self._counts
+                self._counts = counts
+
+        return row
+
+    def add(self, name, weight_idx, count=1):
+        row = self._row(name)  # may grow the counts
+        self._counts[row, weight_idx] += count
+
+    def update(self, other):
+        for name, counts in other.as_dict().items():
+            row = self._row(name)
+            self._counts[row] += counts
+
+    def as_dict(self):
+        counts = self._counts.view()
+        counts.flags.writeable = False
+        return {name: counts[row] for name, row in self._rows.items()}
@@ -1,2 +1,3 @@
 from .ALNS import ALNS
+from .ParallelALNS import ParallelALNS
 from .State import State
@@ -0,0 +1,32 @@
+from .StoppingCriterion import StoppingCriterion
+
+
+class AllOf(StoppingCriterion):
+
+    def __init__(self, *criteria):
+        """
+        Stops once all of the passed-in stopping criteria do at the same
+        iteration. Every criterion is called in each iteration, so their
+        state (e.g. the iterations without improvement) stays up to date.
+
+        Parameters
+        ----------
+        criteria : StoppingCriterion
+            The stopping criteria to combine.
+        """
+        if len(criteria) == 0:
+            raise ValueError("Need at least one stopping criterion.")
+
+        self._criteria = criteria
+
+    @property
+    def criteria(self):
+        return list(self._criteria)
+
+    @property
+    def reason(self):
+        return " and ".join(criterion.reason for criterion in self._criteria)
+
+    def __call__(self, rnd, best, current):
+        return all([criterion(rnd, best, current)
+                    for criterion in self._criteria])
@@ -0,0 +1,35 @@
+from .StoppingCriterion import StoppingCriterion
+
+
+class AnyOf(StoppingCriterion):
+
+    def __init__(self, *criteria):
+        """
+        Stops as soon as any of the passed-in stopping criteria does. Every
+        criterion is called in each iteration, so their state (e.g. the
+        iterations without improvement) stays up to date.
+
+        Parameters
+        ----------
+        criteria : StoppingCriterion
+            The stopping criteria to combine.
+        """
+        if len(criteria) == 0:
+            raise ValueError("Need at least one stopping criterion.")
+
+        self._criteria = criteria
+        self._stopped = []
+
+    @property
+    def criteria(self):
+        return list(self._criteria)
+
+    @property
+    def reason(self):
+        return " or ".join(criterion.reason for criterion in self._stopped)
+
+    def __call__(self, rnd, best, current):
+        self._stopped = [criterion for criterion in self._criteria
+                         if criterion(rnd, best, current)]
+
+        return len(self._stopped) > 0
@@ -0,0 +1,34 @@
+from .StoppingCriterion import StoppingCriterion
+
+
+class MaxIterations(StoppingCriterion):
+
+    def __init__(self, max_iterations):
+        """
+        Stops after a maximum number of iterations.
+
+        Parameters
+        ----------
+        max_iterations : int
+            The number of iterations after which to stop.
+        """
+        if max_iterations < 0:
+            raise ValueError("Negative number of iterations.")
+
+        self._max_iterations = max_iterations
+        self._iterations = 0
+
+    @property
+    def max_iterations(self):
+        return self._max_iterations
+
+    @property
+    def reason(self):
+        return "max_iterations"
+
+    def __call__(self, rnd, best, current):
+        if self._iterations >= self._max_iterations:
+            return True
+
+        self._iterations += 1
+        return False
@@ -0,0 +1,36 @@
+import time
+
+from .StoppingCriterion import StoppingCriterion
+
+
+class MaxRuntime(StoppingCriterion):
+
+    def __init__(self, max_runtime):
+        """
+        Stops once a maximum wall-clock runtime has passed. The clock starts
+        at the first call, that is, right before the first iteration.
+
+        Parameters
+        ----------
+        max_runtime : float
+            The runtime after which to stop, in seconds.
+        """
+        if max_runtime < 0:
+            raise ValueError("Negative runtime.")
+
+        self._max_runtime = max_runtime
+        self._start = None
+
+    @property
+    def max_runtime(self):
+        return self._max_runtime
+
+    @property
+    def reason(self):
+        return "max_runtime"
+
+    def __call__(self, rnd, best, current):
+        if self._start is None:
+            self._start = time.perf_counter()
+
+        return time.perf_counter() - self._start >= self._max_runtime
@@ -0,0 +1,43 @@
+import numpy as np
+
+from .StoppingCriterion import StoppingCriterion
+
+
+class NoImprovement(StoppingCriterion):
+
+    def __init__(self, max_iterations):
+        """
+        Stops when the best solution has not improved for a number of
+        consecutive iterations.
+
+        Parameters
+        ----------
+        max_iterations : int
+            The number of iterations without a new best solution after which
+            to stop.
+        """
+        if max_iterations < 0:
+            raise ValueError("Negative number of iterations.")
+
+        self._max_iterations = max_iterations
+        self._best_objective = np.inf
+        self._stalled = 0
+
+    @property
+    def max_iterations(self):
+        return self._max_iterations
+
+    @property
+    def reason(self):
+        return "no_improvement"
+
+    def __call__(self, rnd, best, current):
+        objective = best.objective()
+
+        if objective < self._best_objective:
+            self._best_objective = objective
+            self._stalled = 0
+        else:
+            self._stalled += 1
+
+        return self._stalled >= self._max_iterations
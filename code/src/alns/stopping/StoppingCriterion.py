@@ -0,0 +1,46 @@
+from abc import ABC, abstractmethod
+
+from ..State import State  # pylint: disable=unused-import
+from numpy.random import RandomState  # pylint: disable=unused-import
+
+
+class StoppingCriterion(ABC):
+    """
+    Base class from which to implement a stopping criterion. It is called
+    before every iteration, so implementations should be cheap.
+    """
+
+    @abstractmethod
+    def __call__(self, rnd, best, current):
+        """
+        Determines whether to stop iterating, based on this criterion and the
+        solution states.
+
+        Parameters
+        ----------
+        rnd : RandomState
+            May be used to draw random numbers from.
+        best : State
+            The best solution state observed so far.
+        current : State
+            The current solution state.
+
+        Returns
+        -------
+        bool
+            Whether to stop iterating (True), or not (False).
+        """
+        return NotImplemented
+
+    @property
+    def reason(self):
+        """
+        Describes why this criterion stops the iteration, as recorded on the
+        result.
+
+        Returns
+        -------
+        str
+            The stop reason.
+        """
+        return type(self).__name__
@@ -0,0 +1,27 @@
+from .StoppingCriterion import StoppingCriterion
+
+
+class TargetObjective(StoppingCriterion):
+
+    def __init__(self, target):
+        """
+        Stops once the best solution reaches a target objective value, that
+        is, once its objective is at most the target.
+
+        Parameters
+        ----------
+        target : float
+            The target objective value.
+        """
+        self._target = target
+
+    @property
+    def target(self):
+        return self._target
+
+    @property
+    def reason(self):
+        return "target_objective"
+
+    def __call__(self, rnd, best, current):
+        return best.objective() <= self._target
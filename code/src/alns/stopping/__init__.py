@@ -0,0 +1,7 @@
+from .AllOf import AllOf
+from .AnyOf import AnyOf
+from .MaxIterations import MaxIterations
+from .MaxRuntime import MaxRuntime
+from .NoImprovement import NoImprovement
+from .StoppingCriterion import StoppingCriterion
+from .TargetObjective import TargetObjective
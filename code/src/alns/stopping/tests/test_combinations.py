@@ -0,0 +1,69 @@
+import numpy.random as rnd
+from numpy.testing import assert_, assert_equal, assert_raises
+
+from alns.stopping import (AllOf, AnyOf, MaxIterations, NoImprovement,
+                           TargetObjective)
+from alns.tests.states import One, Two, Zero
+
+
+def test_raises_no_criteria():
+    """
+    A combination needs at least one criterion.
+    """
+    with assert_raises(ValueError):
+        AnyOf()
+
+    with assert_raises(ValueError):
+        AllOf()
+
+
+def test_any_of_stops_on_first():
+    """
+    AnyOf stops once one of its criteria does, and reports that criterion's
+    reason.
+    """
+    stop = AnyOf(MaxIterations(10), TargetObjective(0))
+
+    assert_(not stop(rnd.RandomState(), One(), One()))
+    assert_(stop(rnd.RandomState(), Zero(), One()))
+    assert_equal(stop.reason, "target_objective")
+
+
+def test_any_of_updates_every_criterion():
+    """
+    Every criterion is called in each iteration, also after an earlier one
+    already stops.
+    """
+    iterations = MaxIterations(2)
+    stop = AnyOf(TargetObjective(1), iterations)
+
+    for _ in range(2):
+        assert_(stop(rnd.RandomState(), One(), One()))
+
+    assert_(stop(rnd.RandomState(), Two(), Two()))
+    assert_equal(stop.reason, "max_iterations")
+
+
+def test_all_of_stops_when_all_do():
+    """
+    AllOf only stops once all of its criteria do at the same time.
+    """
+    stop = AllOf(MaxIterations(1), NoImprovement(3))
+
+    assert_(not stop(rnd.RandomState(), Two(), Two()))
+    assert_(not stop(rnd.RandomState(), Two(), Two()))
+    assert_(not stop(rnd.RandomState(), Two(), Two()))
+    assert_(stop(rnd.RandomState(), Two(), Two()))
+    assert_equal(stop.reason, "max_iterations and no_improvement")
+
+
+def test_nested_combinations():
+    """
+    Combinations can be combined themselves.
+    """
+    stop = AnyOf(AllOf(MaxIterations(0), TargetObjective(1)),
+                 TargetObjective(0))
+
+    assert_(not stop(rnd.RandomState(), Two(), Two()))
+    assert_(stop(rnd.RandomState(), One(), Two()))
+    assert_equal(stop.reason, "max_iterations and target_objective")
@@ -0,0 +1,36 @@
+import numpy.random as rnd
+from numpy.testing import assert_, assert_equal, assert_raises
+
+from alns.stopping import MaxIterations
+from alns.tests.states import One, Zero
+
+
+def test_raises_negative_iterations():
+    """
+    A negative number of iterations is not understood.
+    """
+    with assert_raises(ValueError):
+        MaxIterations(-1)
+
+
+def test_stops_after_max_iterations():
+    """
+    Tests if the criterion allows exactly max_iterations iterations.
+    """
+    stop = MaxIterations(3)
+
+    for _ in range(3):
+        assert_(not stop(rnd.RandomState(), Zero(), One()))
+
+    assert_(stop(rnd.RandomState(), Zero(), One()))
+
+
+def test_zero_iterations():
+    """
+    Zero iterations stops right away.
+    """
+    assert_(MaxIterations(0)(rnd.RandomState(), Zero(), Zero()))
+
+
+def test_reason():
+    assert_equal(MaxIterations(1).reason, "max_iterations")
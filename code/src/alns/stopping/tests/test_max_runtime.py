@@ -0,0 +1,39 @@
+import time
+
+import numpy.random as rnd
+from numpy.testing import assert_, assert_equal, assert_raises
+
+from alns.stopping import MaxRuntime
+from alns.tests.states import One, Zero
+
+
+def test_raises_negative_runtime():
+    """
+    A negative runtime is not understood.
+    """
+    with assert_raises(ValueError):
+        MaxRuntime(-1.)
+
+
+def test_stops_after_max_runtime():
+    """
+    Tests if the criterion stops once the runtime has passed, counting from
+    the first call.
+    """
+    stop = MaxRuntime(.05)
+
+    assert_(not stop(rnd.RandomState(), Zero(), One()))
+
+    time.sleep(.06)
+    assert_(stop(rnd.RandomState(), Zero(), One()))
+
+
+def test_zero_runtime():
+    """
+    Zero runtime stops right away.
+    """
+    assert_(MaxRuntime(0)(rnd.RandomState(), Zero(), Zero()))
+
+
+def test_reason():
+    assert_equal(MaxRuntime(1.).reason, "max_runtime")
@@ -0,0 +1,43 @@
+import numpy.random as rnd
+from numpy.testing import assert_, assert_equal, assert_raises
+
+from alns.stopping import NoImprovement
+from alns.tests.states import One, Two, Zero
+
+
+def test_raises_negative_iterations():
+    """
+    A negative number of iterations is not understood.
+    """
+    with assert_raises(ValueError):
+        NoImprovement(-1)
+
+
+def test_stops_without_improvement():
+    """
+    Tests if the criterion allows max_iterations iterations without a new
+    best, and then stops.
+    """
+    stop = NoImprovement(2)
+
+    assert_(not stop(rnd.RandomState(), Two(), Two()))
+    assert_(not stop(rnd.RandomState(), Two(), Two()))
+    assert_(stop(rnd.RandomState(), Two(), Two()))
+
+
+def test_improvement_resets():
+    """
+    A new best solution restarts the count.
+    """
+    stop = NoImprovement(2)
+
+    assert_(not stop(rnd.RandomState(), Two(), Two()))
+    assert_(not stop(rnd.RandomState(), Two(), Two()))
+    assert_(not stop(rnd.RandomState(), One(), One()))
+    assert_(not stop(rnd.RandomState(), Zero(), One()))
+    assert_(not stop(rnd.RandomState(), Zero(), One()))
+    assert_(stop(rnd.RandomState(), Zero(), One()))
+
+
+def test_reason():
+    assert_equal(NoImprovement(1).reason, "no_improvement")
@@ -0,0 +1,21 @@
+import numpy.random as rnd
+from numpy.testing import assert_, assert_equal
+
+from alns.stopping import TargetObjective
+from alns.tests.states import One, Two, Zero
+
+
+def test_stops_at_target():
+    """
+    Tests if the criterion stops once the best objective is at most the
+    target, regardless of the current solution.
+    """
+    stop = TargetObjective(1)
+
+    assert_(not stop(rnd.RandomState(), Two(), Two()))
+    assert_(stop(rnd.RandomState(), One(), Two()))
+    assert_(stop(rnd.RandomState(), Zero(), Two()))
+
+
+def test_reason():
+    assert_equal(TargetObjective(0).reason, "target_objective")
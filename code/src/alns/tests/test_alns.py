@@ -1,11 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import numpy.random as rnd
 from numpy.testing import (assert_, assert_almost_equal, assert_equal,
                            assert_no_warnings, assert_raises, assert_warns)
 
 from alns import ALNS, State
+from alns.Statistics import Statistics
 from alns.criteria import HillClimbing, SimulatedAnnealing
+from alns.stopping import MaxRuntime, NoImprovement, TargetObjective
 from alns.tools.warnings import OverwriteWarning
-from .states import One, Zero
+from .states import One, Two, Zero
 
 
 # HELPERS ----------------------------------------------------------------------
@@ -40,6 +45,20 @@ class ValueState(State):
         return self._value
 
 
+class CountingState(State):
+    """
+    Helper state that counts how often its objective is computed.
+    """
+
+    def __init__(self, value):
+        self._value = value
+        self.evaluations = 0
+
+    def objective(self):
+        self.evaluations += 1
+        return self._value
+
+
 # CALLBACKS --------------------------------------------------------------------
 
 def dummy_callback():
@@ -266,6 +285,18 @@ def test_does_not_raise():
     alns.iterate(Zero(), [1, 1, 1, 1], 1., HillClimbing(), 100)
 
 
+def test_raises_no_candidates():
+    """
+    Every iteration should compute at least one candidate.
+    """
+    alns = get_alns_instance([lambda state, rnd: One()],
+                             [lambda state, rnd: One()])
+
+    with assert_raises(ValueError):
+        alns.iterate(Zero(), [1, 1, 1, 1], .5, HillClimbing(), 10,
+                     num_candidates=0)
+
+
 # EXAMPLES ---------------------------------------------------------------------
 
 
@@ -301,4 +332,231 @@ def test_fixed_seed_outcomes():
 
         assert_almost_equal(result.best_state.objective(), desired, decimal=5)
 
+
+# STOPPING CRITERIA ------------------------------------------------------------
+
+
+def test_stop_reason_max_iterations():
+    """
+    Without a stopping criterion all iterations run, which is recorded as
+    the stop reason.
+    """
+    alns = get_alns_instance([lambda state, rnd: One()],
+                             [lambda state, rnd: One()])
+
+    result = alns.iterate(Zero(), [1, 1, 1, 1], .5, HillClimbing(), 10)
+
+    assert_equal(result.stop_reason, "max_iterations")
+    assert_equal(len(result.statistics.objectives), 11)
+
+
+def test_stops_at_target_objective():
+    """
+    The iteration stops once the target objective is reached.
+    """
+    values = iter([3, 2, 1, 0, 0, 0])
+
+    alns = get_alns_instance([lambda state, rnd: state],
+                             [lambda state, rnd: ValueState(next(values))])
+
+    result = alns.iterate(ValueState(4), [1, 1, 1, 1], .5, HillClimbing(), 100,
+                          stop=TargetObjective(1))
+
+    assert_equal(result.best_state.objective(), 1)
+    assert_equal(result.stop_reason, "target_objective")
+    assert_equal(len(result.statistics.objectives), 4)
+
+
+def test_stops_without_improvement():
+    """
+    The iteration stops once the best solution stalls.
+    """
+    alns = get_alns_instance([lambda state, rnd: One()],
+                             [lambda state, rnd: One()])
+
+    result = alns.iterate(Zero(), [1, 1, 1, 1], .5, HillClimbing(), 100,
+                          stop=NoImprovement(5))
+
+    assert_equal(result.stop_reason, "no_improvement")
+    assert_equal(len(result.statistics.objectives), 6)
+
+
+def test_stops_at_max_runtime():
+    """
+    A zero runtime stops before the first iteration.
+    """
+    alns = get_alns_instance([lambda state, rnd: Zero()],
+                             [lambda state, rnd: Zero()])
+
+    initial_solution = One()
+    result = alns.iterate(initial_solution, [1, 1, 1, 1], .5, HillClimbing(),
+                          100, stop=MaxRuntime(0))
+
+    assert_(result.best_state is initial_solution)
+    assert_equal(result.stop_reason, "max_runtime")
+
+
+# STATISTICS -------------------------------------------------------------------
+
+
+def test_collects_records():
+    """
+    The statistics hold a record of every operator pair applied, with the
+    operator indices and outcome.
+    """
+    alns = get_alns_instance([lambda state, rnd: state],
+                             [lambda state, rnd: Zero(), lambda state, rnd: One()],
+                             seed=1)
+
+    result = alns.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(), 10,
+                          num_candidates=2)
+    records = result.statistics.records
+
+    assert_equal(len(records), 2 * 10)
+    assert_equal(records["iteration"], np.repeat(np.arange(10), 2))
+    assert_(np.all(records["runtime"] >= 0))
+
+    # The outcome counts agree with the records.
+    counts = result.statistics.destroy_operator_counts
+
+    for d_idx in range(2):
+        outcomes = records["outcome"][records["destroy"] == d_idx]
+        assert_equal(np.bincount(outcomes, minlength=4), counts[str(d_idx)])
+
+
+def test_collects_into_statistics():
+    """
+    A passed-in Statistics object is collected into, and returned.
+    """
+    alns = get_alns_instance([lambda state, rnd: One()],
+                             [lambda state, rnd: One()])
+
+    statistics = Statistics(window=5)
+    result = alns.iterate(Zero(), [1, 1, 1, 1], .5, HillClimbing(), 50,
+                          collect_stats=statistics)
+
+    assert_(result.statistics is statistics)
+    assert_(5 <= len(statistics.objectives) <= 10)
+    assert_equal(sum(statistics.destroy_operator_counts["0"]), 50)
+
+
+# OBJECTIVE EVALUATIONS --------------------------------------------------------
+
+
+def test_objective_evaluated_once_per_state():
+    """
+    Every state's objective is computed once, even though the loop, the
+    acceptance and stopping criteria and the statistics all use it.
+    """
+    states = []
+
+    def operator(state, rnd):
+        states.append(CountingState(rnd.random_sample()))
+        return states[-1]
+
+    alns = get_alns_instance([lambda state, rnd: state], [operator], seed=1)
+
+    initial_solution = CountingState(1)
+    states.append(initial_solution)
+
+    for criterion in [HillClimbing(), SimulatedAnnealing(1, .25, 1 / 100)]:
+        alns.iterate(initial_solution, [1, 1, 1, 1], .5, criterion, 50,
+                     num_candidates=2, stop=NoImprovement(25))
+
+        assert_(all(state.evaluations == 1 for state in states))
+
+        initial_solution.evaluations = 0
+        del states[1:]
+
+
+def test_evaluated_state_attributes():
+    """
+    Criteria get evaluated states, through which the state's attributes
+    are still available.
+    """
+    attributes = []
+
+    class Criterion(HillClimbing):
+        def accept(self, rnd, best, current, candidate):
+            attributes.append(candidate.evaluations)
+            return super().accept(rnd, best, current, candidate)
+
+    alns = get_alns_instance([lambda state, rnd: state],
+                             [lambda state, rnd: CountingState(0)])
+
+    alns.iterate(One(), [1, 1, 1, 1], .5, Criterion(), 3)
+
+    assert_equal(attributes, [1, 1, 1])
+
+
+# MULTIPLE CANDIDATES ----------------------------------------------------------
+
+
+def test_multiple_candidates_picks_best():
+    """
+    Of the candidates of an iteration the best one is considered, so with a
+    destroy operator that only sometimes finds zero, a few candidates per
+    iteration find it in the first iteration.
+    """
+    values = iter([1, 1, 0, 1])
+
+    alns = get_alns_instance([lambda state, rnd: state],
+                             [lambda state, rnd: ValueState(next(values))])
+
+    result = alns.iterate(Two(), [1, 1, 1, 1], .5, HillClimbing(), 1,
+                          num_candidates=4)
+
+    assert_equal(result.best_state.objective(), 0)
+
+
+def test_multiple_candidates_counts_every_pair():
+    """
+    The operator counts hold an outcome for every pair tried, but the
+    objectives only one value per iteration.
+    """
+    alns = get_alns_instance([lambda state, rnd: state],
+                             [lambda state, rnd: ValueState(rnd.random_sample()),
+                              lambda state, rnd: ValueState(2)],
+                             seed=1)
+
+    result = alns.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(), 25,
+                          num_candidates=3)
+    statistics = result.statistics
+
+    assert_equal(len(statistics.objectives), 26)
+
+    destroy_counts = statistics.destroy_operator_counts
+    assert_equal(sum(map(sum, destroy_counts.values())), 3 * 25)
+    assert_equal(sum(statistics.repair_operator_counts["0"]), 3 * 25)
+
+    # The second destroy operator never improves on anything, so it is
+    # rejected whenever it is tried.
+    assert_equal(destroy_counts["1"][:3], [0, 0, 0])
+
+
+def test_multiple_candidates_executor_outcomes():
+    """
+    The candidates are computed with random states seeded in a fixed order,
+    so computing them on a thread pool gives the same outcome as computing
+    them one after the other.
+    """
+    outcomes = []
+
+    for executor in [None, ThreadPoolExecutor(4)]:
+        alns = get_alns_instance(
+            [lambda state, rnd: ValueState(rnd.random_sample())],
+            [lambda state, rnd: None],
+            seed=2)
+
+        result = alns.iterate(One(), [1, 1, 1, 1], .5,
+                              SimulatedAnnealing(1, .25, 1 / 100), 50,
+                              num_candidates=4, executor=executor)
+
+        outcomes.append(result.best_state.objective())
+
+        if executor is not None:
+            executor.shutdown()
+
+    assert_equal(outcomes[0], outcomes[1])
+
 # TODO test more complicated examples?
@@ -0,0 +1,274 @@
+import os
+
+import numpy.random as rnd
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises)
+
+from alns import ALNS, ParallelALNS, State
+from alns.Statistics import Statistics
+from alns.criteria import HillClimbing, SimulatedAnnealing
+from alns.stopping import NoImprovement
+from .states import One, Zero
+
+
+# HELPERS ----------------------------------------------------------------------
+
+
+class ValueState(State):
+    """
+    Helper state for testing random values.
+    """
+
+    def __init__(self, value):
+        self._value = value
+
+    def objective(self):
+        return self._value
+
+
+def get_alns_instance(repair_operators, destroy_operators):
+    """
+    Test helper method.
+    """
+    alns = ALNS(rnd.RandomState())
+
+    for idx, repair_operator in enumerate(repair_operators):
+        alns.add_repair_operator(repair_operator, name=str(idx))
+
+    for idx, destroy_operator in enumerate(destroy_operators):
+        alns.add_destroy_operator(destroy_operator, name=str(idx))
+
+    return alns
+
+
+def random_value_alns():
+    """
+    ALNS whose candidates have a random objective in [0, 1).
+    """
+    return get_alns_instance([lambda state, rnd: state],
+                             [lambda state, rnd: ValueState(rnd.random_sample())])
+
+
+def failing_operator(state, rnd_state):
+    raise ValueError("Operator failure.")
+
+
+def exiting_operator(state, rnd_state):
+    os._exit(1)
+
+
+# PARAMETERS -------------------------------------------------------------------
+
+
+def test_raises_invalid_islands():
+    """
+    At least one island is needed, and migration needs a positive interval.
+    """
+    alns = random_value_alns()
+
+    with assert_raises(ValueError):
+        ParallelALNS(alns, num_islands=0)
+
+    with assert_raises(ValueError):
+        ParallelALNS(alns, num_islands=2, migration_interval=0)
+
+
+def test_raises_criteria_count_mismatch():
+    """
+    When a list of criteria is passed, there should be one for each island.
+    """
+    parallel = ParallelALNS(random_value_alns(), num_islands=3)
+
+    with assert_raises(ValueError):
+        parallel.iterate(One(), [1, 1, 1, 1], .5,
+                         [HillClimbing(), HillClimbing()], 10)
+
+
+def test_raises_invalid_parameters():
+    """
+    Invalid iteration parameters are raised before any island starts.
+    """
+    parallel = ParallelALNS(random_value_alns(), num_islands=2)
+
+    with assert_raises(ValueError):
+        parallel.iterate(One(), [1, 1, 1, 1], 1.5, HillClimbing(), 10)
+
+
+def test_raises_island_failure():
+    """
+    An exception in an island is raised in the calling process.
+    """
+    alns = get_alns_instance([lambda state, rnd: state], [failing_operator])
+    parallel = ParallelALNS(alns, num_islands=2, migration_interval=5)
+
+    with assert_raises(RuntimeError):
+        parallel.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(), 20)
+
+
+def test_raises_island_exit():
+    """
+    An island that dies without reporting is detected, rather than waited
+    for forever.
+    """
+    alns = get_alns_instance([lambda state, rnd: state], [exiting_operator])
+    parallel = ParallelALNS(alns, num_islands=2, migration_interval=5)
+
+    with assert_raises(RuntimeError):
+        parallel.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(), 20)
+
+
+# RESULTS ----------------------------------------------------------------------
+
+
+def test_trivial_example():
+    """
+    As in the ALNS tests, any operator returns zero, so that is the best.
+    """
+    alns = get_alns_instance([lambda state, rnd: Zero()],
+                             [lambda state, rnd: Zero()])
+    parallel = ParallelALNS(alns, num_islands=2, migration_interval=10)
+
+    result = parallel.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(), 50)
+
+    assert_equal(result.best_state.objective(), 0)
+
+
+def test_merged_statistics():
+    """
+    The merged statistics count every iteration of every island, and keep
+    one objective per iteration.
+    """
+    parallel = ParallelALNS(random_value_alns(), num_islands=3,
+                            migration_interval=7, seed=1)
+
+    result = parallel.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(), 40)
+    statistics = result.statistics
+
+    assert_equal(len(statistics.objectives), 41)
+    assert_equal(sum(statistics.destroy_operator_counts["0"]), 3 * 40)
+    assert_equal(sum(statistics.repair_operator_counts["0"]), 3 * 40)
+
+    # With hill climbing the current objective is also the best one, so the
+    # last merged objective is the best objective over all islands.
+    assert_almost_equal(statistics.objectives[-1],
+                        result.best_state.objective())
+
+
+def test_no_statistics():
+    """
+    Statistics are not collected when asked not to.
+    """
+    parallel = ParallelALNS(random_value_alns(), num_islands=2, seed=1)
+    result = parallel.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(), 10,
+                              collect_stats=False)
+
+    assert_(result._statistics is None)
+
+
+def test_fixed_seed_outcomes():
+    """
+    The same seed gives the same outcome, also with a random criterion and
+    migrations.
+    """
+    outcomes = []
+
+    for _ in range(2):
+        parallel = ParallelALNS(random_value_alns(), num_islands=3,
+                                migration_interval=5, seed=42)
+
+        result = parallel.iterate(One(), [1, 1, 1, 1], .5,
+                                  SimulatedAnnealing(1, .25, 1 / 100), 30)
+
+        outcomes.append(result.best_state.objective())
+
+    assert_equal(outcomes[0], outcomes[1])
+
+
+def test_per_island_criteria():
+    """
+    Each island may use its own criterion.
+    """
+    parallel = ParallelALNS(random_value_alns(), num_islands=2, seed=3)
+    criteria = [HillClimbing(), SimulatedAnnealing(1, .25, 1 / 100)]
+
+    result = parallel.iterate(One(), [1, 1, 1, 1], .5, criteria, 20)
+
+    assert_(result.best_state.objective() < 1)
+
+
+def test_migration_spreads_best():
+    """
+    After a migration every island continues from the best state found so
+    far, so with hill climbing no island ends worse than the best state at
+    the first migration.
+    """
+    parallel = ParallelALNS(random_value_alns(), num_islands=4,
+                            migration_interval=10, seed=7)
+
+    result = parallel.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(), 20)
+    objectives = result.statistics.objectives
+
+    assert_almost_equal(result.best_state.objective(), objectives[-1])
+    assert_(objectives[-1] <= objectives[10])
+
+
+def test_island_stops_early():
+    """
+    Islands that stop early leave the migrations to the others, and the
+    result records why the best island stopped.
+    """
+    alns = get_alns_instance([lambda state, rnd: state],
+                             [lambda state, rnd: One()])
+    parallel = ParallelALNS(alns, num_islands=3, migration_interval=2, seed=1)
+
+    result = parallel.iterate(Zero(), [1, 1, 1, 1], .5, HillClimbing(), 50,
+                              stop=NoImprovement(5))
+
+    assert_equal(result.best_state.objective(), 0)
+    assert_equal(result.stop_reason, "no_improvement")
+    assert_equal(len(result.statistics.objectives), 6)
+
+
+def test_progress(capfd):
+    """
+    The islands show no progress bars of their own, only the coordinating
+    process shows one, and none when asked not to.
+    """
+    parallel = ParallelALNS(random_value_alns(), num_islands=3,
+                            migration_interval=5, seed=1)
+
+    parallel.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(), 20,
+                     progress=False)
+    assert_equal(capfd.readouterr().err, "")
+
+    parallel.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(), 20)
+    err = capfd.readouterr().err
+    assert_equal(err.count("\n"), 1)
+    assert_("20/20" in err)
+
+
+# STATISTICS -------------------------------------------------------------------
+
+
+def test_merge_statistics_pads_short_runs():
+    """
+    A run that stopped early keeps its last objective in the merged values.
+    """
+    first = Statistics()
+    second = Statistics()
+
+    for objective in [5, 4, 3]:
+        first.collect_objective(objective)
+
+    for objective in [6, 2]:
+        second.collect_objective(objective)
+
+    first.collect_destroy_operator("destroy", 0)
+    second.collect_destroy_operator("destroy", 0)
+    second.collect_repair_operator("repair", 3)
+
+    merged = Statistics.merge([first, second])
+
+    assert_almost_equal(merged.objectives, [5, 2, 2])
+    assert_equal(merged.destroy_operator_counts["destroy"], [2, 0, 0, 0])
+    assert_equal(merged.repair_operator_counts["repair"], [0, 0, 0, 1])
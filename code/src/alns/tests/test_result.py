@@ -1,7 +1,7 @@
 import numpy as np
 import numpy.random as rnd
 import pytest
-from numpy.testing import assert_, assert_raises
+from numpy.testing import assert_, assert_equal, assert_raises
 
 from alns.Result import Result
 from alns.Statistics import Statistics
@@ -125,6 +125,15 @@ def test_result_state():
     assert_(get_result(best).best_state is best)
 
 
+def test_result_stop_reason():
+    """
+    Tests if the result object returns the passed-in stop reason, if any.
+    """
+    assert_(Result(Sentinel()).stop_reason is None)
+    assert_equal(Result(Sentinel(), stop_reason="max_runtime").stop_reason,
+                 "max_runtime")
+
+
 def test_raises_missing_statistics():
     """
     Accessing the statistics object when no statistics have been passed-in
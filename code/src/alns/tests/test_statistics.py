@@ -1,6 +1,12 @@
-from numpy.testing import assert_equal, assert_almost_equal
+import gc
+import os
+import pickle
 
-from alns.Statistics import Statistics
+import numpy as np
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises)
+
+from alns.Statistics import RECORD_DTYPE, Statistics
 
 
 def test_empty_new_statistics():
@@ -58,3 +64,137 @@ def test_collect_repair_counts_example():
     for idx, count in enumerate([0, 0, 1, 0]):
         assert_equal(statistics.repair_operator_counts["repair_test"][idx],
                      count)
+
+
+def test_objectives_is_read_only_view():
+    """
+    The objectives are a view on the collected values, which cannot be
+    written to.
+    """
+    statistics = Statistics()
+
+    for objective in range(10):
+        statistics.collect_objective(objective)
+
+    objectives = statistics.objectives
+
+    assert_(objectives.dtype == np.float64)
+    assert_(np.shares_memory(objectives, statistics.objectives))
+
+    with assert_raises(ValueError):
+        objectives[0] = 5
+
+
+def test_collect_many_objectives():
+    """
+    Collecting beyond the initial capacity keeps every objective.
+    """
+    statistics = Statistics()
+
+    for objective in range(5000):
+        statistics.collect_objective(objective)
+
+    assert_equal(statistics.objectives, np.arange(5000))
+
+
+def test_window_keeps_recent():
+    """
+    With a window, at least the most recent window objectives and records
+    are kept, while the counts cover everything.
+    """
+    statistics = Statistics(window=10)
+
+    for iteration in range(95):
+        statistics.collect_objective(iteration)
+        statistics.collect_destroy_operator("destroy", 1)
+        statistics.collect_record(iteration, 0, 0, 1, .5)
+
+    objectives = statistics.objectives
+
+    assert_(10 <= len(objectives) <= 20)
+    assert_equal(objectives, np.arange(95 - len(objectives), 95))
+    assert_equal(statistics.records["iteration"], objectives)
+    assert_equal(statistics.destroy_operator_counts["destroy"], [0, 95, 0, 0])
+
+
+def test_views_outlive_window_compaction(tmp_path):
+    """
+    Objectives taken out before the window drops values still read as
+    they did, also when they are spilled to file.
+    """
+    for spill_dir in [None, str(tmp_path)]:
+        statistics = Statistics(window=5, spill_dir=spill_dir)
+
+        for objective in range(10):
+            statistics.collect_objective(objective)
+
+        objectives = statistics.objectives
+
+        for objective in range(10, 30):
+            statistics.collect_objective(objective)
+
+        assert_equal(objectives, np.arange(10))
+        assert_equal(statistics.objectives[-5:], np.arange(25, 30))
+
+
+def test_raises_invalid_window():
+    with assert_raises(ValueError):
+        Statistics(window=0)
+
+
+def test_collect_records():
+    """
+    Records are collected as a structured array.
+    """
+    statistics = Statistics()
+
+    statistics.collect_record(0, 1, 2, 3, .25)
+    statistics.collect_record(1, 0, 1, 0, .5)
+
+    records = statistics.records
+
+    assert_equal(records.dtype, RECORD_DTYPE)
+    assert_equal(records["iteration"], [0, 1])
+    assert_equal(records["destroy"], [1, 0])
+    assert_equal(records["repair"], [2, 1])
+    assert_equal(records["outcome"], [3, 0])
+    assert_almost_equal(records["runtime"], [.25, .5])
+
+
+def test_spill_to_file(tmp_path):
+    """
+    Spilled objectives and records live in memory-mapped files, which are
+    removed with the Statistics object.
+    """
+    statistics = Statistics(spill_dir=str(tmp_path))
+
+    for objective in range(3000):
+        statistics.collect_objective(objective)
+        statistics.collect_record(objective, 0, 1, 2, 0.)
+
+    assert_equal(statistics.objectives, np.arange(3000))
+    assert_equal(statistics.records["iteration"], np.arange(3000))
+    assert_equal(len(os.listdir(str(tmp_path))), 2)
+
+    del statistics
+    gc.collect()
+
+    assert_equal(len(os.listdir(str(tmp_path))), 0)
+
+
+def test_pickle_spilled_statistics(tmp_path):
+    """
+    Spilled statistics are pickled with their values, not their files.
+    """
+    statistics = Statistics(window=5, spill_dir=str(tmp_path))
+
+    for objective in range(12):
+        statistics.collect_objective(objective)
+
+    statistics.collect_repair_operator("repair", 2)
+
+    loaded = pickle.loads(pickle.dumps(statistics))
+    loaded.collect_objective(12)
+
+    assert_equal(loaded.objectives[-3:], [10, 11, 12])
+    assert_equal(loaded.repair_operator_counts["repair"], [0, 0, 1, 0])
@@ -8,6 +8,7 @@ SCRIPT_DIR = os.path.dirname(PARENT_DIR)
 INPUT = os.path.join(MAIN_DIR, "input")
 OUTPUT = os.path.join(MAIN_DIR, "output")
 RESULT = os.path.join(MAIN_DIR, "result")
+CACHE = os.path.join(MAIN_DIR, "cache")
 DATA_PATH = os.path.join(PARENT_DIR, "psp_instances")
 TRAINED_MODELS = os.path.join(MAIN_DIR, "trained_models")
 CONFIG = os.path.join(MAIN_DIR, "dr_configs")
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CODE_DIR)
+
+from rcjsp import Parser  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def parsed():
+    """
+    The repository's attraction and tourist profiles, parsed without cache
+    """
+    return Parser(os.path.join(CODE_DIR, "AttractionProfile.csv"),
+                  os.path.join(CODE_DIR, "TouristProfile.csv"),
+                  cache_dir=None)
@@ -0,0 +1,77 @@
+import os
+
+import batch_solver
+from src.alns.criteria import HillClimbing
+
+# A tourist whose must visits can be placed, so that its operators run
+KILLED = "4"
+
+# A tourist whose must visit Night Safari is never open in its touring hours
+BLOCKED = "9"
+
+
+def keep(state, rnd_state):
+    return state
+
+
+def die_on_killed(state, rnd_state):
+    if state.tourist.idx == KILLED:
+        os._exit(1)
+    return state
+
+
+def solve(parsed, destroy):
+    return batch_solver.solve_all(parsed, [destroy], [keep], HillClimbing(), [3, 2, 1, 0.5], 0.8,
+                                  iterations=5, processes=2, chunksize=3, progress=False)
+
+
+def test_no_progress_output(parsed, capfd):
+    """
+    Without progress nothing is printed, also not by the runs in the
+    workers
+    """
+    results = solve(parsed, keep)
+    assert [result.tourist_idx for result in results] == [tourist.idx for tourist in parsed.tourists]
+    assert capfd.readouterr().err == ""
+
+
+def test_sample_tourists_solved(parsed):
+    """
+    No sample tourist fails, must visit names no attraction has are
+    reported rather than failing the run
+    """
+    results = solve(parsed, keep)
+    assert all(result.error is None for result in results)
+    assert any(result.unknown_must_visit for result in results)
+
+
+def test_blocked_tourists_reported(parsed):
+    """
+    A tourist whose must visits cannot all be placed is reported with the
+    blocking constraint and gets no ALNS run, unless asked to
+    """
+    results = {result.tourist_idx : result for result in solve(parsed, keep)}
+    assert results[BLOCKED].blocked_must_visit == (("hours", ("Night Safari, Singapore",)),)
+    assert results[BLOCKED].objective is None and results[BLOCKED].schedule is None
+    assert all(result.objective is not None for result in results.values() if not result.blocked_must_visit)
+
+    results = batch_solver.solve_all(parsed, [keep], [keep], HillClimbing(), [3, 2, 1, 0.5], 0.8,
+                                     iterations=5, processes=2, progress=False, skip_blocked=False)
+    blocked = next(result for result in results if result.tourist_idx == BLOCKED)
+    assert blocked.blocked_must_visit and blocked.objective is not None
+
+
+def test_worker_death_is_reported(parsed):
+    """
+    A worker that dies does not hang the batch, its tourist is reported
+    and every other tourist is solved as without the death
+    """
+    expected = solve(parsed, keep)
+    results = solve(parsed, die_on_killed)
+
+    assert len(results) == len(expected)
+    for result, reference in zip(results, expected):
+        if result.tourist_idx == KILLED:
+            assert result.error == batch_solver._WORKER_DIED
+        else:
+            assert result == reference
@@ -0,0 +1,45 @@
+from must_visit import plan_must_visits
+from rcjsp import SMJSP, Attraction, AttractionTable, CandidateSet, Tourist
+
+# Start times tried against can_assign, every slot of the day
+TIMES = [slot / 2 for slot in range(49)]
+
+
+def test_windows_match_can_assign(parsed):
+    """
+    An attraction is a candidate exactly when it can be assigned at some
+    time of some touring day, and its window on a day spans the feasible
+    start times on the slot grid
+    """
+    for tourist in parsed.tourists[::5]:
+        candidates = CandidateSet(tourist, parsed.attraction_table)
+        ids = set(candidates.ids.tolist())
+        for attraction in parsed.attractions:
+            feasible = {day : [time for time in TIMES if tourist.can_assign(attraction, time, day)]
+                        for day in tourist.touring_dict}
+            feasible = {day : times for day, times in feasible.items() if times}
+            assert (attraction.idx in ids) == bool(feasible)
+            assert candidates.days(attraction.idx) == sorted(feasible)
+            for day, times in feasible.items():
+                earliest, latest = candidates.window(attraction.idx, day)
+                assert earliest <= times[0] < earliest + 0.5
+                assert latest - 0.5 < times[-1] <= latest
+
+
+def test_candidates_follow_closures(parsed):
+    """
+    Closing an attraction after the state was created takes it off that
+    day, also for the must visit placement
+    """
+    # A table of its own, closing attractions must not reach the other tests
+    columns = parsed.attraction_table.to_columns()
+    table = AttractionTable.from_columns({key : value.copy() for key, value in columns.items()})
+    attractions = [Attraction(table, idx) for idx in range(len(table))]
+    name = attractions[3].attraction_name
+    tourist = Tourist.from_fields("0", parsed.tourists[0].preferences, 10000, [name], 3, (8, 20))
+    state = SMJSP(tourist, attractions, candidates=CandidateSet(tourist, table))
+    assert [insertion.day for insertion in plan_must_visits(state)] == [1]
+
+    table.close([3], 1)
+    assert state.candidates.window(3, 1) is None
+    assert [insertion.day for insertion in plan_must_visits(state)] == [2]
@@ -0,0 +1,90 @@
+import random
+
+from rcjsp import SMJSP
+
+
+def snapshot(state : SMJSP) -> tuple:
+    """
+    Everything rollback has to restore, as plain values
+    """
+    tourist = state.tourist
+    return (tourist.travel_distance, tourist.attractiveness, tourist.must_visit_missing, tourist.money_spent,
+            {day : list(attractions) for day, attractions in tourist.locations.items()},
+            {day : dict(times) for day, times in tourist.start_times.items()},
+            {day : (list(timeline.starts), list(timeline.ends), list(timeline.attractions),
+                    timeline.busy, timeline.on_grid)
+             for day, timeline in tourist.timelines.items()},
+            list(state.unassigned), list(state.solution))
+
+
+def mutate(state : SMJSP, rng : random.Random, moves : int) -> None:
+    """
+    Random assigns and removes, as an operator would make them
+    """
+    tourist = state.tourist
+    for _ in range(moves):
+        assigned = [attraction for attractions in tourist.locations.values() for attraction in attractions]
+        if assigned and rng.random() < 0.4:
+            attraction = rng.choice(assigned)
+            tourist.remove(attraction)
+            continue
+        attraction = rng.choice(state.attractions)
+        day = rng.choice(list(tourist.touring_dict))
+        times = [slot / 2 for slot in range(16, 44) if tourist.can_assign(attraction, slot / 2, day)]
+        if attraction not in assigned and times:
+            tourist.assign(attraction, day, rng.choice(times))
+
+
+def test_nested_rollback(parsed):
+    """
+    Rolling back to an inner checkpoint restores the state at that mark,
+    the outer checkpoint then still rolls back or commits everything since
+    it, also on a copy of the state
+    """
+    rng = random.Random(18)
+    for tourist in parsed.tourists[:20]:
+        state = SMJSP(tourist.copy(), parsed.attractions)
+        mutate(state, rng, 20)
+
+        for _ in range(20):
+            before = snapshot(state)
+            outer = state.checkpoint()
+            mutate(state, rng, 8)
+
+            middle = snapshot(state)
+            inner = state.checkpoint()
+            mutate(state, rng, 5)
+            state.rollback(inner)
+            assert snapshot(state) == middle
+
+            if rng.random() < 0.7:
+                state.rollback(outer)
+                assert snapshot(state) == before
+            else:
+                state.commit()
+                assert snapshot(state) == middle
+
+        copied = state.copy()
+        mark = copied.checkpoint()
+        mutate(copied, rng, 6)
+        copied.rollback(mark)
+        assert snapshot(copied) == snapshot(state)
+
+
+def test_unassigned_follows_schedule(parsed):
+    """
+    Unassigned is what is neither scheduled nor visited, on a copy as well
+    as on the state it was copied from
+    """
+    state = SMJSP(parsed.tourists[0].copy(), parsed.attractions)
+    mutate(state, random.Random(7), 20)
+    copied = state.copy()
+    mutate(copied, random.Random(8), 20)
+    copied.tourist.finish_day(next(day for day in copied.tourist.touring_dict
+                                   if copied.tourist.locations.get(day)))
+
+    for checked in [state, copied]:
+        tourist = checked.tourist
+        scheduled = {attraction for attractions in tourist.locations.values() for attraction in attractions}
+        assert checked.unassigned == [attraction for attraction in parsed.attractions
+                                      if attraction not in scheduled and attraction not in tourist.visited]
@@ -0,0 +1,86 @@
+import itertools
+import math
+import random
+
+import numpy as np
+import pytest
+
+from day_solver import _ceil_grid, apply_day, exact_day_repair, objective_bound, solve_day
+from rcjsp import MAX_ACTIVITIES_PER_DAY, MIN_BREAK, SMJSP
+
+
+def clear_day(state : SMJSP, day : int) -> SMJSP:
+    state = state.copy()
+    for attraction in list(state.tourist._locations.get(day, [])):
+        state.tourist.remove(attraction)
+    return state
+
+
+def brute_force(state : SMJSP, day : int, candidates : list) -> float:
+    """
+    Best objective change of any ordered schedule of up to
+    MAX_ACTIVITIES_PER_DAY candidates, every visit starting as early as
+    possible, compared to the day being empty
+    """
+    tourist = state.tourist
+    others = {attraction.idx for other, timeline in tourist._timelines.items() if other != day
+              for attraction in timeline.attractions}
+    candidates = [attraction for attraction in candidates if attraction.idx not in others]
+    cleared = clear_day(state, day)
+    base = cleared.objective()
+
+    best = 0.0
+    for size in range(1, MAX_ACTIVITIES_PER_DAY + 1):
+        for order in itertools.permutations(candidates, size):
+            if any(day not in attraction.opening_hours for attraction in order):
+                continue
+            mark = cleared.checkpoint()
+            ready = -np.inf
+            for attraction in order:
+                earliest = max(attraction.opening_hours[day][0], tourist.touring_dict[day][0])
+                start = float(max(_ceil_grid(earliest), _ceil_grid(ready)))
+                if not cleared.tourist.can_assign(attraction, start, day):
+                    break
+                cleared.tourist.assign(attraction, day, start)
+                ready = start + attraction.task_time + MIN_BREAK
+            else:
+                best = min(best, cleared.objective() - base)
+            cleared.rollback(mark)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_solve_day_matches_brute_force(parsed, seed):
+    """
+    solve_day finds the best schedule over every order of every choice of
+    candidates, and apply_day realises its value
+    """
+    rng = random.Random(seed)
+    # A copy, the parsed tourists are shared with the other tests
+    tourist = parsed.tourists[rng.randrange(len(parsed.tourists))].copy()
+    # Light on distance, so that most days take more than one visit
+    state = SMJSP(tourist, parsed.attractions, [0.2 * rng.random(), 1.0])
+    random_state = np.random.RandomState(seed)
+    for _ in range(3):
+        exact_day_repair(state, random_state)
+
+    day = rng.randrange(1, tourist.days)
+    candidates = rng.sample(parsed.attractions, 14)
+    schedule = solve_day(state, day, candidates)
+    assert math.isclose(schedule.value, brute_force(state, day, candidates), abs_tol=1e-6)
+
+    cleared = clear_day(state, day)
+    base = cleared.objective()
+    apply_day(cleared, day, schedule)
+    assert math.isclose(cleared.objective() - base, schedule.value, abs_tol=1e-6)
+
+
+def test_objective_bound(parsed):
+    """
+    The bound is below the objective of any plan found
+    """
+    state = SMJSP(parsed.tourists[0].copy(), parsed.attractions)
+    random_state = np.random.RandomState(0)
+    for _ in range(10):
+        exact_day_repair(state, random_state)
+    assert objective_bound(state) <= state.objective() + 1e-9
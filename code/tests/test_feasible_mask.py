@@ -0,0 +1,34 @@
+import random
+
+import numpy as np
+
+from rcjsp import MAX_DAY, SMJSP
+
+# Start times on the half hour grid and off it
+GRID_TIMES = np.arange(48) / 2
+OFF_GRID_TIMES = np.arange(0, 24, 0.3)
+
+
+def test_matches_can_assign(parsed):
+    """
+    Entry [i, j] of feasible_mask is can_assign(attraction i, times[j]),
+    on empty days, days that already hold visits and days outside the
+    tour, for times on and off the slot grid
+    """
+    rng = random.Random(2)
+    for tourist in parsed.tourists[:15]:
+        tourist = SMJSP(tourist.copy(), parsed.attractions).tourist
+        for _ in range(rng.randrange(0, 8)):
+            attraction = rng.choice(parsed.attractions)
+            day = rng.choice(list(tourist.touring_dict))
+            times = [time / 2 for time in range(48) if tourist.can_assign(attraction, time / 2, day)]
+            if times and tourist.placement(attraction) is None:
+                tourist.assign(attraction, day, rng.choice(times))
+
+        for day in range(-1, MAX_DAY + 2):
+            for times in [GRID_TIMES, OFF_GRID_TIMES, np.concatenate([GRID_TIMES[::4], [12.25]])]:
+                mask = tourist.feasible_mask(parsed.attraction_table, day, times)
+                assert mask.shape == (len(parsed.attractions), len(times))
+                for attraction in parsed.attractions:
+                    assert mask[attraction.idx].tolist() == \
+                        [tourist.can_assign(attraction, time, day) for time in times]
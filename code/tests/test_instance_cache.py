@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+
+import instance_cache
+from conftest import CODE_DIR
+from rcjsp import Parser
+
+ATTRACTIONS = os.path.join(CODE_DIR, "AttractionProfile.csv")
+TOURISTS = os.path.join(CODE_DIR, "TouristProfile.csv")
+
+
+def test_store_replaces_stale_cache(tmp_path):
+    """
+    A new store replaces the cached columns and leaves no temporary
+    directories behind
+    """
+    cache_dir = str(tmp_path)
+    stat = os.stat(ATTRACTIONS)
+    content_hash = instance_cache.file_hash(ATTRACTIONS)
+
+    instance_cache.store(ATTRACTIONS, cache_dir, {"x" : np.arange(3)}, stat, content_hash)
+    instance_cache.store(ATTRACTIONS, cache_dir, {"y" : np.arange(4)}, stat, content_hash)
+
+    columns = instance_cache.load(ATTRACTIONS, cache_dir)
+    assert list(columns) == ["y"]
+    assert np.array_equal(columns["y"], np.arange(4))
+    assert os.listdir(cache_dir) == [os.path.basename(instance_cache.cache_path(ATTRACTIONS, cache_dir))]
+
+
+def test_warm_cache_raw_rows(tmp_path):
+    """
+    On a warm cache the raw csv rows are read on first access, not left
+    empty
+    """
+    cold = Parser(ATTRACTIONS, TOURISTS, cache_dir=str(tmp_path))
+    warm = Parser(ATTRACTIONS, TOURISTS, cache_dir=str(tmp_path))
+
+    assert warm._attraction_data is None and warm._tourist_data is None
+    assert warm.attraction_data == cold.attraction_data
+    assert warm.tourist_data == cold.tourist_data
+    assert len(warm.tourist_data) == len(warm.tourists)
+
+
+def test_warm_cache_names_interned(tmp_path):
+    """
+    Attraction names from the cache are interned str, not numpy strings
+    converted again on every access
+    """
+    Parser(ATTRACTIONS, TOURISTS, cache_dir=str(tmp_path))
+    warm = Parser(ATTRACTIONS, TOURISTS, cache_dir=str(tmp_path))
+
+    assert isinstance(warm.attraction_table.names, list)
+    for attraction in warm.attractions:
+        name = attraction.attraction_name
+        assert type(name) is str
+        assert name is attraction.attraction_name
+        assert name is sys.intern(str(name))
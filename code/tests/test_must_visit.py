@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from must_visit import MustVisitInfeasible, plan_must_visits
+from rcjsp import SMJSP, Tourist
+
+# Start times tried by the exhaustive search, every slot of the day
+TIMES = [slot / 2 for slot in range(49)]
+
+
+def exhaustive(tourist : Tourist, attractions : list) -> bool:
+    """
+    Whether the attractions can all be assigned, trying every day and slot
+    for each in turn
+    """
+    if not attractions:
+        return True
+    attraction = attractions[0]
+    for day in tourist.touring_dict:
+        for time in TIMES:
+            if tourist.can_assign(attraction, time, day):
+                tourist.assign(attraction, day, time)
+                found = exhaustive(tourist, attractions[1:])
+                tourist.remove(attraction)
+                if found:
+                    return True
+    return False
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_plan_matches_exhaustive_search(parsed, seed):
+    """
+    plan_must_visits places the must visits exactly when some assignment
+    of them exists, and its insertions are feasible in turn
+    """
+    rng = random.Random(seed)
+    for _ in range(15):
+        base = rng.choice(parsed.tourists)
+        attractions = rng.sample(parsed.attractions, rng.choice([1, 2, 3]))
+        tourist = Tourist.from_fields(base.idx, base.preferences, rng.choice([60, 150, 400, 2000]),
+                                      [attraction.attraction_name for attraction in attractions],
+                                      rng.choice([2, 3]), rng.choice([(8, 14), (10, 18), (8, 22)]))
+        state = SMJSP(tourist, parsed.attractions)
+
+        # A visit already on the first day to plan around
+        other = rng.choice([attraction for attraction in parsed.attractions if attraction not in attractions])
+        time = next((time for time in TIMES if tourist.can_assign(other, time, 1)), None)
+        if time is not None:
+            tourist.assign(other, 1, time)
+
+        try:
+            insertions = plan_must_visits(state)
+        except MustVisitInfeasible:
+            insertions = None
+        assert (insertions is not None) == exhaustive(tourist, attractions)
+
+        if insertions is not None:
+            for insertion in insertions:
+                assert tourist.can_assign(insertion.attraction, insertion.time, insertion.day)
+                tourist.assign(insertion.attraction, insertion.day, insertion.time)
+            assert tourist.must_visit_missing == 0
+
+
+def test_abbreviated_names(parsed):
+    """
+    Must visit names that are the leading words of an attraction's name
+    refer to it, names no attraction has are reported and stay missing
+    """
+    tourist = Tourist.from_fields("0", parsed.tourists[0].preferences, 10000,
+                                  ["Pulau Ubin", "Marina Bay Sands", "Orchard Road"], 3, (8, 22))
+    state = SMJSP(tourist, parsed.attractions)
+
+    assert tourist.must_visit == ["Pulau Ubin & Singapore Islands", "Marina Bay Sands, Singapore",
+                                  "Orchard Road"]
+    assert state.unknown_must_visit == ["Orchard Road"]
+    assert sorted(insertion.attraction.attraction_name for insertion in plan_must_visits(state)) == \
+        ["Marina Bay Sands, Singapore", "Pulau Ubin & Singapore Islands"]
+
+
+def test_initialize_sample_tourists(parsed):
+    """
+    Every sample tourist can be initialized, must visits that cannot all
+    be placed are left out, recorded with their constraint and counted as
+    missing
+    """
+    blocked = 0
+    for tourist in parsed.tourists:
+        state = SMJSP(tourist.copy(), parsed.attractions)
+        state.random_initialize(1)
+        placed = {attraction.attraction_name for timeline in state.tourist.timelines.values()
+                  for attraction in timeline.attractions}
+        assert state.tourist.must_visit_missing == len(set(state.tourist.must_visit) - placed)
+
+        left_out = {name for _, names in state.blocked_must_visit for name in names}
+        assert set(state.tourist.must_visit) - placed == left_out | set(state.unknown_must_visit)
+        blocked += bool(left_out)
+    assert blocked > 0
@@ -0,0 +1,70 @@
+import numpy as np
+
+from opening_index import OpeningHoursIndex
+from rcjsp import MAX_DAY, Attraction, AttractionTable
+
+# Query times and durations, on and off the half hour grid
+TIMES = np.arange(-1, 25, 0.25)
+DURATIONS = [None, 0.5, 1.0, 2.5, 4.0, 24.0]
+
+
+def brute_force(table : AttractionTable, day : int, time : float, duration : float = None) -> np.ndarray:
+    """
+    Sorted ids whose whole visit from time falls in the opening hours, and
+    in [time, time + duration] when given
+    """
+    hours = table.opening_hours[:, day]
+    fits = (hours[:, 0] <= time) & (time + table.task_time <= hours[:, 1])
+    if duration is not None:
+        fits &= table.task_time <= duration
+    return np.flatnonzero(fits)
+
+
+def test_startable_matches_brute_force(parsed):
+    """
+    Every day, time and duration gives the same attractions as checking
+    each one
+    """
+    table = parsed.attraction_table
+    index = OpeningHoursIndex(table)
+    for day in range(MAX_DAY + 1):
+        for time in TIMES:
+            for duration in DURATIONS:
+                assert np.array_equal(index.startable(day, time, duration),
+                                      brute_force(table, day, time, duration))
+
+
+def test_startable_random_table():
+    """
+    As above on a table large enough for a deep tree, with hours off the
+    half hour grid and days closed at random
+    """
+    rng = np.random.RandomState(11)
+    n = 2000
+    opens = rng.uniform(0, 20, (n, MAX_DAY + 1))
+    hours = np.stack([opens, opens + rng.uniform(0, 10, (n, MAX_DAY + 1))], axis=2)
+    hours[rng.random_sample((n, MAX_DAY + 1)) < 0.2] = np.nan
+    table = AttractionTable([str(idx) for idx in range(n)], rng.random_sample((n, 2)),
+                            rng.uniform(0.1, 6, n), hours, np.zeros(n, dtype=np.int64),
+                            np.zeros(n, dtype=np.int64))
+    index = OpeningHoursIndex(table)
+    for day in range(MAX_DAY + 1):
+        for time in TIMES[::3]:
+            for duration in DURATIONS:
+                assert np.array_equal(index.startable(day, time, duration),
+                                      brute_force(table, day, time, duration))
+
+
+def test_startable_after_changes(parsed):
+    """
+    Closures and new opening hours are picked up by the index
+    """
+    columns = parsed.attraction_table.to_columns()
+    table = AttractionTable.from_columns({key : value.copy() for key, value in columns.items()})
+    index = OpeningHoursIndex(table)
+    assert np.array_equal(index.startable(1, 12.0), brute_force(table, 1, 12.0))
+
+    table.close(np.arange(0, len(table), 2), 1)
+    Attraction(table, 1).opening_hours[1] = [6.0, 9.5]
+    for time in TIMES:
+        assert np.array_equal(index.startable(1, time), brute_force(table, 1, time))
@@ -0,0 +1,64 @@
+import math
+import random
+
+from rcjsp import SMJSP, Attraction, Removal
+
+
+def test_remove_by_fresh_view(parsed):
+    """
+    A new view of an assigned row is the same attraction, so it can be used
+    to remove the visit
+    """
+    # A copy, the parsed tourists are shared with the other tests
+    state = SMJSP(parsed.tourists[0].copy(), parsed.attractions)
+    tourist = state.tourist
+    attraction = parsed.attractions[5]
+    day, time = next((day, time / 2) for day in tourist.touring_dict for time in range(48)
+                     if tourist.can_assign(attraction, time / 2, day))
+
+    tourist.assign(attraction, day, time)
+    view = Attraction(parsed.attraction_table, 5)
+    assert view == attraction and hash(view) == hash(attraction)
+    assert tourist.placement(view) == (day, time)
+
+    tourist.remove(view)
+    assert tourist.placement(attraction) is None
+    assert not tourist.timelines.get(day)
+
+
+def test_placement_index_matches_schedule(parsed):
+    """
+    Through random assigns and removes the placement of every attraction
+    is where the schedule has it, removals cost what delta_objective says,
+    and finish_day moves the day's visits to visited
+    """
+    rng = random.Random(19)
+    for tourist in parsed.tourists[:20]:
+        state = SMJSP(tourist.copy(), parsed.attractions)
+        tourist = state.tourist
+        for _ in range(200):
+            attraction = rng.choice(parsed.attractions)
+            if tourist.placement(attraction) is not None:
+                if rng.random() < 0.5:
+                    objective = state.objective()
+                    delta = state.delta_objective(Removal(attraction))
+                    tourist.remove(attraction)
+                    assert math.isclose(state.objective(), objective + delta, abs_tol=1e-9)
+            else:
+                day = rng.choice(list(tourist.touring_dict))
+                times = [slot / 2 for slot in range(16, 44) if tourist.can_assign(attraction, slot / 2, day)]
+                if times:
+                    tourist.assign(attraction, day, rng.choice(times))
+
+            for other in parsed.attractions:
+                expected = next(((day, tourist.start_times[day][other.attraction_name])
+                                 for day, attractions in tourist.locations.items() if other in attractions),
+                                None)
+                assert tourist.placement(other) == expected
+
+        day = next(day for day in tourist.touring_dict if tourist.locations.get(day))
+        finished = list(tourist.locations[day])
+        tourist.finish_day(day)
+        assert day not in tourist.touring_dict
+        assert tourist.visited == set(finished) and tourist.visited_log == finished
+        assert all(tourist.placement(attraction) is None for attraction in finished)
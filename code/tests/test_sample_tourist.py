@@ -0,0 +1,24 @@
+import random
+
+from rcjsp import Parser
+from test_instance_cache import ATTRACTIONS, TOURISTS
+
+
+def test_same_tourist_on_every_path(parsed, tmp_path):
+    """
+    A seed picks the same tourist from loaded tourists, the cache and the
+    csv, the one random.choice picks
+    """
+    parsers = [parsed,
+               Parser(ATTRACTIONS, TOURISTS, cache_dir=None, lazy_tourists=True),
+               Parser(ATTRACTIONS, TOURISTS, cache_dir=str(tmp_path), lazy_tourists=True)]
+    assert parsers[2]._cached_tourist_columns() is None
+
+    # Warm the tourist cache for the last parser
+    Parser(ATTRACTIONS, TOURISTS, cache_dir=str(tmp_path))
+    assert parsers[2]._cached_tourist_columns() is not None
+
+    for seed in range(20):
+        expected = random.Random(seed).choice(parsed.tourists).idx
+        for parser in parsers:
+            assert parser.sample_tourist(random.Random(seed)).idx == expected
@@ -0,0 +1,102 @@
+import random
+
+import numpy as np
+
+from rcjsp import MAX_ACTIVITIES_PER_DAY, MAX_DAY, SMJSP, Attraction, AttractionTable, Tourist
+
+
+def with_task_times(parsed, task_time : np.ndarray) -> list:
+    """
+    Views of the repository's attractions with other task times, as the
+    profiles only have whole and half hours
+    """
+    columns = dict(parsed.attraction_table.to_columns(), task_time=task_time)
+    table = AttractionTable.from_columns(columns)
+    return [Attraction(table, idx) for idx in range(len(table))]
+
+
+def float_can_assign(tourist : Tourist, attraction, time : float, day : int) -> bool:
+    """
+    can_assign with float comparisons only, as before the slot grid
+    """
+    timeline = tourist.timelines.get(day)
+    if attraction.cost + tourist.money_spent > tourist.budget or day not in tourist.touring_dict:
+        return False
+    if timeline is not None and len(timeline) >= MAX_ACTIVITIES_PER_DAY:
+        return False
+    if not 0 <= day <= MAX_DAY:
+        return False
+    start, end = tourist.touring_dict[day]
+    if time < start or time + attraction.task_time > end:
+        return False
+    hours = attraction.table.opening_hours[attraction.idx, day]
+    if not (time >= hours[0] and time + attraction.task_time <= hours[1]):
+        return False
+    return timeline is None or timeline.fits(time, time + attraction.task_time)
+
+
+def off_grid_tourist(tourist : Tourist, touring_hours : tuple) -> Tourist:
+    return Tourist.from_fields(tourist.idx, tourist.preferences, tourist.budget, [],
+                               tourist.days, touring_hours)
+
+
+def test_touring_end_off_grid(parsed):
+    """
+    A visit ending exactly at touring hours that end off the slot grid fits,
+    also when its last slot reaches past them: touring (7, 20.75) and a 1.2
+    hour visit at 19.5
+    """
+    hours = parsed.attraction_table.opening_hours[:, 1]
+    idx = int(np.flatnonzero((hours[:, 0] <= 19.5) & (hours[:, 1] >= 21))[0])
+    task_time = parsed.attraction_table.task_time.copy()
+    task_time[idx] = 1.2
+    attraction = with_task_times(parsed, task_time)[idx]
+    tourist = off_grid_tourist(parsed.tourists[0], (7, 20.75))
+
+    assert tourist.can_assign(attraction, 19.5, 1)
+    assert tourist.feasible_mask(attraction.table, 1, [19.5])[attraction.idx, 0]
+    assert not tourist.can_assign(attraction, 20.0, 1)
+
+
+def test_grid_matches_float(parsed):
+    """
+    Random assignments and removals, with touring hours and task times on
+    and off the grid: can_assign and feasible_mask agree with the float
+    checks throughout
+    """
+    rng = random.Random(15)
+    task_time = parsed.attraction_table.task_time
+    off_grid = with_task_times(parsed, task_time + np.arange(len(task_time)) % 5 * 0.2)
+    times = np.arange(48) / 2
+
+    for n, tourist in enumerate(parsed.tourists[:30]):
+        attractions = off_grid if n % 2 else parsed.attractions
+        table = attractions[0].table
+        if rng.random() < 0.5:
+            start = rng.randrange(0, 48) / 4
+            tourist = off_grid_tourist(tourist, (start, start + rng.randrange(40, 140) / 10))
+        # A copy, the parsed tourists are shared with the other tests
+        tourist = SMJSP(tourist.copy(), attractions).tourist
+
+        for _ in range(200):
+            attraction = rng.choice(attractions)
+            day = rng.randrange(-1, MAX_DAY + 2)
+            time = rng.randrange(0, 50) / 2
+            if rng.random() < 0.1:
+                time += 0.25
+
+            feasible = tourist.can_assign(attraction, time, day)
+            assert feasible == float_can_assign(tourist, attraction, time, day)
+            if feasible and rng.random() < 0.5 and tourist.placement(attraction) is None:
+                tourist.assign(attraction, day, time)
+            if rng.random() < 0.05 and tourist.visited_log:
+                visited = [attraction for attraction in tourist.visited_log
+                           if tourist.placement(attraction) is not None]
+                if visited:
+                    tourist.remove(rng.choice(visited))
+
+        for day in tourist.touring_dict:
+            mask = tourist.feasible_mask(table, day, times)
+            for idx in range(0, len(table), 3):
+                for j, time in enumerate(times):
+                    assert mask[idx, j] == float_can_assign(tourist, attractions[idx], time, day)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from distance_matrix import haversine_km
+from spatial_index import GridIndex
+
+
+def query_points(lat_long : np.ndarray, rng : np.random.RandomState, n : int) -> np.ndarray:
+    """
+    Random (longitude, latitude) points, in and well outside the bounding
+    box of lat_long
+    """
+    low, high = lat_long.min(axis=0), lat_long.max(axis=0)
+    span = np.maximum(high - low, 1e-3)
+    inside = low + rng.random_sample((n, 2)) * span
+    outside = low - span + rng.random_sample((n, 2)) * 3 * span
+    far = np.column_stack([rng.uniform(-180, 180, n // 4), rng.uniform(-80, 80, n // 4)])
+    return np.concatenate([inside, outside, far])
+
+
+def check_index(lat_long : np.ndarray, rng : np.random.RandomState) -> None:
+    index = GridIndex(lat_long)
+    for point in query_points(lat_long, rng, 40):
+        distances = haversine_km(point, lat_long)
+        nearest = np.sort(distances)
+
+        for k in [1, 3, 10, len(lat_long) + 5]:
+            ids, found = index.knn(point, k)
+            k = min(k, len(lat_long))
+            assert np.allclose(found[0], nearest[:k])
+            assert np.allclose(distances[ids[0]], found[0])
+            assert len(set(ids[0].tolist())) == k
+
+        for radius_km in [0.5, 2.0, 10.0, 500.0]:
+            assert np.array_equal(index.radius(point, radius_km)[0], np.flatnonzero(distances <= radius_km))
+
+
+def test_matches_brute_force(parsed):
+    """
+    knn and radius give the same attractions as measuring the distance to
+    every one, also for queries far outside the attractions
+    """
+    check_index(parsed.attraction_table.lat_long, np.random.RandomState(13))
+
+
+def test_high_latitude_points():
+    """
+    Far from the equator a degree of longitude is short, so the query box
+    has to be widened in longitude
+    """
+    rng = np.random.RandomState(17)
+    lat_long = np.column_stack([rng.uniform(-20, 20, 500), rng.uniform(70, 85, 500)])
+    check_index(lat_long, rng)
+
+
+def test_points_across_date_line():
+    """
+    Points on both sides of longitude 180 are near each other
+    """
+    rng = np.random.RandomState(19)
+    lon = rng.uniform(170, 190, 300)
+    lat_long = np.column_stack([np.where(lon > 180, lon - 360, lon), rng.uniform(-10, 10, 300)])
+    check_index(lat_long, rng)